@@ -0,0 +1,53 @@
+"""
+Compare the sync DRF read endpoints with their native async counterparts
+under /api/async/ on a running server, e.g.:
+
+    uvicorn room_manager.asgi:application --port 8071
+    python -m benchmarks.async_reads --base-url http://localhost:8071
+
+Needs at least one public event and one room in the target database.
+"""
+import argparse
+import json
+from functools import partial
+
+from benchmarks.http import request, run_load
+
+PATHS = (
+    ('event list', '/api/events/', '/api/async/events/'),
+    ('room list', '/api/rooms/', '/api/async/rooms/'),
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://localhost:8071')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--output', help="Write the results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    for label, sync_path, async_path in PATHS:
+        for flavour, path in (('sync', sync_path), ('async', async_path)):
+            url = args.base_url.rstrip('/') + path
+            stats = run_load(
+                [partial(request, 'GET', url)] * args.requests,
+                args.concurrency
+            )
+            results.append({'endpoint': label, 'flavour': flavour, **stats})
+            print(
+                f"{label:>12} {flavour:>5}: {stats['throughput']:8.1f} req/s"
+                f"  p50 {stats['p50_ms']:7.1f} ms"
+                f"  p95 {stats['p95_ms']:7.1f} ms"
+                f"  p99 {stats['p99_ms']:7.1f} ms"
+                f"  {stats['statuses']}"
+            )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
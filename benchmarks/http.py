@@ -0,0 +1,89 @@
+"""
+Minimal HTTP load driver shared by the benchmark scripts: a thread pool of
+clients, per-request latency, and percentile summaries.
+"""
+import base64
+import json
+import math
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def basic_auth(username: str, password: str) -> Dict[str, str]:
+    token = base64.b64encode(f'{username}:{password}'.encode()).decode()
+    return {'Authorization': f'Basic {token}'}
+
+
+def token_auth(token: str) -> Dict[str, str]:
+    return {'Authorization': f'Token {token}'}
+
+
+def request(
+    method: str,
+    url: str,
+    body: Optional[dict] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, bytes]:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method)
+    req.add_header('Accept', 'application/json')
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    for name, value in (headers or {}).items():
+        req.add_header(name, value)
+
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def run_load(
+    calls: List[Callable[[], Tuple[int, bytes]]],
+    concurrency: int
+) -> dict:
+    """
+    Run every call on a pool of ``concurrency`` clients and summarize
+    latency (ms), throughput (req/s) and status codes.
+    """
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    def timed(call: Callable[[], Tuple[int, bytes]]) -> Tuple[float, int]:
+        started = time.perf_counter()
+        try:
+            status, _body = call()
+        except OSError:
+            status = 0
+        return (time.perf_counter() - started) * 1000, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, status in pool.map(timed, calls):
+            latencies.append(latency)
+            statuses[status] = statuses.get(status, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(calls),
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(calls) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+    }
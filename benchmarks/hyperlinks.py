@@ -0,0 +1,84 @@
+"""
+Compare list serialization of events with DRF's HyperlinkedRelatedField and
+with room.serializers.CachedHyperlinkedRelatedField.
+
+Runs on in-memory instances, no database needed:
+
+    python -m benchmarks.hyperlinks --rows 10000
+"""
+import argparse
+import datetime
+import os
+import timeit
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'room_manager.settings')
+django.setup()
+
+from rest_framework import serializers  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from room.models import Room, Event  # noqa: E402
+from room.serializers import EventSerializer  # noqa: E402
+
+
+class ReverseEventSerializer(EventSerializer):
+    serializer_related_field = serializers.HyperlinkedRelatedField
+
+    room = serializers.HyperlinkedRelatedField(
+        view_name='room-detail',
+        queryset=Room.objects.all()
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rooms = [
+        Room(id=i, name=f'room {i}', capacity=50) for i in range(1, 101)
+    ]
+    start = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+    events = [
+        Event(
+            id=i,
+            name=f'event {i}',
+            room=rooms[i % len(rooms)],
+            starts_at=start + datetime.timedelta(hours=i),
+            ends_at=start + datetime.timedelta(hours=i + 1),
+            is_public=True,
+        )
+        for i in range(1, args.rows + 1)
+    ]
+
+    def render(serializer_class):
+        # A fresh request per run, as per-request caches would be in use.
+        request = Request(
+            APIRequestFactory().get('/api/events/', HTTP_HOST='localhost')
+        )
+        return serializer_class(
+            events,
+            many=True,
+            context={'request': request}
+        ).data
+
+    assert render(ReverseEventSerializer) == render(EventSerializer)
+
+    for label, serializer_class in (
+        ('reverse() per link', ReverseEventSerializer),
+        ('cached prefix', EventSerializer),
+    ):
+        best = min(timeit.repeat(
+            lambda: render(serializer_class),
+            number=1,
+            repeat=args.repeat
+        ))
+        print(f'{label:>20}: {best * 1000:8.1f} ms for {args.rows} rows')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Load benchmark for the reservation API hot paths: public event listing,
+room detail, the reservation list and reservation create under contention.
+
+Seeds its own rooms, events and users (tagged per run, so runs do not
+collide) in the database of DJANGO_SETTINGS_MODULE, drives a running server
+with concurrent clients and checks afterwards that no event took more
+reservations than its room holds. The server must use the same database:
+
+    export DJANGO_SETTINGS_MODULE=benchmarks.sqlite_settings
+    python manage.py migrate
+    python manage.py runserver --noreload 8071 &
+    python -m benchmarks.reservations --output results.json
+
+Results are printed and, with --output, written as JSON for comparing runs.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'room_manager.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from benchmarks.http import (  # noqa: E402
+    basic_auth,
+    request,
+    run_load,
+    token_auth,
+)
+from room_manager.authentication import make_token  # noqa: E402
+from room.models import Event, Room  # noqa: E402
+
+PASSWORD: str = 'benchmark'
+
+
+def seed(args: argparse.Namespace, tag: str) -> dict:
+    """
+    Bulk create the benchmark data set. The first ``hot_events`` events are
+    public, in rooms of ``hot_capacity`` seats, and are the ones contended
+    for; the rest are background rows for the list endpoints.
+    """
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    # One hash for every user, the default hasher is deliberately slow.
+    password: str = make_password(PASSWORD)
+    users: List[User] = User.objects.bulk_create(
+        (
+            User(username=f'bench-{tag}-{i}', password=password)
+            for i in range(args.users)
+        ),
+        batch_size=1000
+    )
+
+    rooms: List[Room] = Room.objects.bulk_create(
+        [
+            Room(name=f'bench {tag} hot {i}', capacity=args.hot_capacity)
+            for i in range(args.hot_events)
+        ] + [
+            Room(name=f'bench {tag} {i}', capacity=rng.randint(10, 200))
+            for i in range(args.rooms)
+        ],
+        batch_size=1000
+    )
+    hot_rooms, other_rooms = rooms[:args.hot_events], rooms[args.hot_events:]
+
+    hour: datetime.timedelta = datetime.timedelta(hours=1)
+    start: datetime.datetime = timezone.now().replace(
+        minute=0,
+        second=0,
+        microsecond=0
+    ) + datetime.timedelta(days=1)
+    events: List[Event] = [
+        Event(
+            name=f'bench {tag} hot {i}',
+            room=room,
+            starts_at=start,
+            ends_at=start + hour,
+            is_public=True
+        )
+        for i, room in enumerate(hot_rooms)
+    ]
+    for i in range(args.events):
+        # Walk the rooms hour by hour, so slots in a room never overlap.
+        starts_at: datetime.datetime = start + i // len(other_rooms) * hour
+        events.append(
+            Event(
+                name=f'bench {tag} {i}',
+                room=other_rooms[i % len(other_rooms)],
+                starts_at=starts_at,
+                ends_at=starts_at + hour,
+                is_public=rng.random() < args.public_ratio
+            )
+        )
+    events = Event.objects.bulk_create(events, batch_size=1000)
+
+    return {
+        'users': [user.pk for user in users],
+        'tokens': [make_token(user) for user in users],
+        'hot_events': [event.pk for event in events[:args.hot_events]],
+        'rooms': [room.pk for room in other_rooms],
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def overbooking(event_ids: List[int]) -> dict:
+    """
+    Count events holding more reservations than their room's capacity, and
+    events whose reserved_count drifted from the actual reservations.
+    """
+    events = Event.objects.filter(pk__in=event_ids).select_related(
+        'room'
+    ).annotate(reservation_total=Count('reservations'))
+
+    overbooked: List[dict] = []
+    drifted: int = 0
+    reserved: int = 0
+    for event in events:
+        reserved += event.reservation_total
+        if event.reservation_total > event.room.capacity:
+            overbooked.append({
+                'event': event.pk,
+                'capacity': event.room.capacity,
+                'reservations': event.reservation_total,
+            })
+        if event.reserved_count != event.reservation_total:
+            drifted += 1
+
+    return {
+        'violations': len(overbooked),
+        'overbooked': overbooked,
+        'reserved_count_drift': drifted,
+        'reservations': reserved,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://localhost:8071')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rooms', type=int, default=100)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--public-ratio', type=float, default=0.7)
+    parser.add_argument('--hot-events', type=int, default=5)
+    parser.add_argument('--hot-capacity', type=int, default=50)
+    parser.add_argument(
+        '--contenders',
+        type=int,
+        default=200,
+        help="Users racing for each hot event."
+    )
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument(
+        '--auth',
+        choices=('token', 'basic'),
+        default='token',
+        help="Basic auth hashes the password on every request."
+    )
+    parser.add_argument('--output', help="Write the results as JSON.")
+    args = parser.parse_args()
+
+    if args.contenders > args.users:
+        parser.error("--contenders can not exceed --users.")
+
+    tag: str = f'{int(time.time())}-{args.seed}'
+    data: dict = seed(args, tag)
+    rng = random.Random(args.seed)
+    base: str = args.base_url.rstrip('/')
+
+    user_headers: List[Dict[str, str]] = [
+        token_auth(token) if args.auth == 'token' else
+        basic_auth(f'bench-{tag}-{i}', PASSWORD)
+        for i, token in enumerate(data['tokens'])
+    ]
+
+    scenarios: List[Tuple[str, List[Callable[[], Tuple[int, bytes]]]]] = [
+        (
+            'event list',
+            [partial(request, 'GET', f'{base}/api/events/')] * args.requests
+        ),
+        (
+            'room detail',
+            [
+                partial(
+                    request,
+                    'GET',
+                    f'{base}/api/rooms/{rng.choice(data["rooms"])}/'
+                )
+                for _i in range(args.requests)
+            ]
+        ),
+        (
+            'reservation list',
+            [
+                partial(
+                    request,
+                    'GET',
+                    f'{base}/api/reservations/',
+                    headers=rng.choice(user_headers)
+                )
+                for _i in range(args.requests)
+            ]
+        ),
+    ]
+
+    contended: List[Callable[[], Tuple[int, bytes]]] = [
+        partial(
+            request,
+            'POST',
+            f'{base}/api/reservations/',
+            {
+                'event': f'{base}/api/events/{event_id}/',
+                'user': f'{base}/api/users/{user_id}/',
+            },
+            headers=user_headers[i]
+        )
+        for event_id in data['hot_events']
+        for i, user_id in enumerate(data['users'][:args.contenders])
+    ]
+    rng.shuffle(contended)
+    scenarios.append(('reservation create', contended))
+
+    results: List[dict] = []
+    for label, calls in scenarios:
+        stats: dict = run_load(calls, args.concurrency)
+        results.append({'scenario': label, **stats})
+        print(
+            f"{label:>18}: {stats['throughput']:8.1f} req/s"
+            f"  p50 {stats['p50_ms']:7.1f} ms"
+            f"  p95 {stats['p95_ms']:7.1f} ms"
+            f"  p99 {stats['p99_ms']:7.1f} ms"
+            f"  {stats['statuses']}"
+        )
+
+    checked: dict = overbooking(data['hot_events'])
+    print(
+        f"overbooking violations: {checked['violations']}"
+        f"  reserved_count drift: {checked['reserved_count_drift']}"
+    )
+
+    if args.output:
+        report: dict = {
+            'meta': {
+                'started': tag,
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'password_hasher': settings.PASSWORD_HASHERS[0],
+                'base_url': base,
+            },
+            'parameters': {
+                key: value for key, value in vars(args).items()
+                if key not in ('output', 'base_url')
+            },
+            'seed_seconds': data['seconds'],
+            'results': results,
+            'overbooking': checked,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
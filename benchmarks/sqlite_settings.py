@@ -0,0 +1,27 @@
+"""
+SQLite stand-in for running the benchmarks without PostgreSQL:
+
+    export DJANGO_SETTINGS_MODULE=benchmarks.sqlite_settings
+    python manage.py migrate
+    python manage.py runserver --noreload 8071
+
+SQLite serializes writers, so contention numbers are only indicative; use
+PostgreSQL for anything that is compared between runs.
+"""
+import os
+
+from room_manager.settings import *  # noqa: F401,F403
+from room_manager.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'BENCHMARK_SQLITE_NAME',
+            str(BASE_DIR / 'benchmark.sqlite3')
+        ),
+        'OPTIONS': {
+            'timeout': 30,
+        },
+    },
+}
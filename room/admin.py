@@ -4,7 +4,12 @@ from django.contrib import admin
 from room.models import (
     Room,
     Event,
-    Reservation
+    Reservation,
+    WaitlistEntry,
+    SeatHold,
+    IdempotencyKey,
+    ArchivedEvent,
+    ArchivedReservation,
 )
 
 
@@ -35,3 +40,38 @@ class EventAdmin(BaseModelAdmin):
 @admin.register(Reservation)
 class ReservationAdmin(BaseModelAdmin):
     pass
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(BaseModelAdmin):
+    pass
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(BaseModelAdmin):
+    pass
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(BaseModelAdmin):
+    pass
+
+
+class ArchiveModelAdmin(BaseModelAdmin):
+    # Archived rows are a record of the past, written by archive_events only.
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+
+@admin.register(ArchivedEvent)
+class ArchivedEventAdmin(ArchiveModelAdmin):
+    pass
+
+
+@admin.register(ArchivedReservation)
+class ArchivedReservationAdmin(ArchiveModelAdmin):
+    pass
@@ -0,0 +1,242 @@
+import functools
+from typing import Callable, List, Optional, Type
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed
+from django.utils.translation import gettext_lazy as _
+
+from room_manager.authentication import authenticate_token, get_token
+from room_manager.pagination import KeysetPagination
+
+from room.models import (
+    Room,
+    Reservation,
+    held_count,
+)
+from room.pagination import (
+    RoomPagination,
+    EventPagination,
+    ReservationPagination,
+)
+from room.serializers import (
+    RoomSerializer,
+    EventSerializer,
+    ReservationSerializer,
+    get_query_list,
+)
+from room.views import (
+    EventModelViewSet,
+    ReservationSerializerModelViewSet,
+)
+
+# Native async counterparts of the read-only actions of the room viewsets.
+# They answer with the same JSON and apply the same visibility rules.
+# GET is always allowed by IsAdminUser | ReadOnly, so only the reservation
+# list needs a user; a bad token fails every request, as it does there.
+
+SAFE_METHODS: List[str] = ['GET', 'HEAD', 'OPTIONS']
+
+
+def render(data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code
+    )
+
+
+def render_error(
+    request: HttpRequest,
+    exc: APIException
+) -> HttpResponse:
+    response: HttpResponse = render({'detail': exc.detail}, exc.status_code)
+    if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+        # As APIView.handle_exception(): a 401 needs the WWW-Authenticate
+        # header of the first authentication class, without one it is 403.
+        header: Optional[str] = api_settings.DEFAULT_AUTHENTICATION_CLASSES[
+            0
+        ]().authenticate_header(Request(request))
+        if header:
+            response['WWW-Authenticate'] = header
+        else:
+            response.status_code = status.HTTP_403_FORBIDDEN
+
+    return response
+
+
+def api_view(view: Callable) -> Callable:
+    @functools.wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as e:
+            return render_error(request, e)
+
+    return wrapper
+
+
+async def get_user(request: HttpRequest) -> Optional[User]:
+    # Raises AuthenticationFailed for a bad or expired token.
+    token: Optional[str] = get_token(request)
+    if token is not None:
+        return await sync_to_async(authenticate_token)(token)
+
+    # Without a session cookie the user is anonymous; skip the thread hop
+    # that loading the session and user would need.
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return None
+
+    def load() -> Optional[User]:
+        return request.user if request.user.is_authenticated else None
+
+    return await sync_to_async(load)()
+
+
+async def is_staff(request: HttpRequest) -> bool:
+    user: Optional[User] = await get_user(request)
+    return user is not None and user.is_staff
+
+
+async def render_list(
+    request: HttpRequest,
+    queryset: QuerySet,
+    serializer_class: Type,
+    pagination_class: Type[KeysetPagination]
+) -> HttpResponse:
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+
+    drf_request: Request = Request(request)
+    paginator: KeysetPagination = pagination_class()
+
+    page_queryset: QuerySet = paginator.get_page_queryset(
+        queryset,
+        drf_request
+    )
+
+    page: list = paginator.paginate_results(
+        [instance async for instance in page_queryset]
+    )
+    serializer = serializer_class(
+        page,
+        many=True,
+        context={'request': drf_request}
+    )
+    return render(paginator.get_paginated_response(serializer.data).data)
+
+
+async def render_detail(
+    request: HttpRequest,
+    queryset: QuerySet,
+    serializer_class: Type,
+    pk: str
+) -> HttpResponse:
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+
+    try:
+        instance = await queryset.aget(pk=pk)
+    except (queryset.model.DoesNotExist, ValueError):
+        return render({'detail': _('Not found.')}, status.HTTP_404_NOT_FOUND)
+
+    serializer = serializer_class(
+        instance,
+        context={'request': Request(request)}
+    )
+    return render(serializer.data)
+
+
+async def event_queryset(request: HttpRequest) -> QuerySet:
+    qs: QuerySet = EventModelViewSet.queryset.annotate(
+        held_count=held_count()
+    )
+    for name in get_query_list(Request(request), 'expand'):
+        qs = qs.select_related(
+            *EventModelViewSet.expand_select_related.get(name, ())
+        )
+
+    if not await is_staff(request):
+        qs = qs.filter(is_public=True)
+
+    return qs
+
+
+@api_view
+async def room_list(request: HttpRequest) -> HttpResponse:
+    await get_user(request)
+    return await render_list(
+        request,
+        Room.objects.all(),
+        RoomSerializer,
+        RoomPagination
+    )
+
+
+@api_view
+async def room_detail(request: HttpRequest, pk: str) -> HttpResponse:
+    await get_user(request)
+    return await render_detail(
+        request,
+        Room.objects.all(),
+        RoomSerializer,
+        pk
+    )
+
+
+@api_view
+async def event_list(request: HttpRequest) -> HttpResponse:
+    return await render_list(
+        request,
+        await event_queryset(request),
+        EventSerializer,
+        EventPagination
+    )
+
+
+@api_view
+async def event_detail(request: HttpRequest, pk: str) -> HttpResponse:
+    return await render_detail(
+        request,
+        await event_queryset(request),
+        EventSerializer,
+        pk
+    )
+
+
+@api_view
+async def reservation_list(request: HttpRequest) -> HttpResponse:
+    user: Optional[User] = await get_user(request)
+    if user is None:
+        return render_error(request, NotAuthenticated())
+
+    qs: QuerySet = Reservation.objects.all()
+    for name in get_query_list(Request(request), 'expand'):
+        qs = qs.select_related(
+            *ReservationSerializerModelViewSet.expand_select_related.get(
+                name,
+                ()
+            )
+        )
+
+    if not user.is_staff:
+        qs = qs.filter(user=user)
+
+    return await render_list(
+        request,
+        qs,
+        ReservationSerializer,
+        ReservationPagination
+    )
@@ -0,0 +1,46 @@
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+GENERATION_KEY: str = 'room:public-events:generation'
+
+
+def get_cache() -> BaseCache:
+    return caches[settings.PUBLIC_EVENT_CACHE['ALIAS']]
+
+
+def get_timeout() -> Optional[int]:
+    return settings.PUBLIC_EVENT_CACHE['TIMEOUT']
+
+
+def get_generation() -> int:
+    cache: BaseCache = get_cache()
+    generation: Optional[int] = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+
+    return generation
+
+
+def bump_generation() -> None:
+    # A fresh timestamp rather than incr(), so an evicted counter can never
+    # restart at a value that old entries are still stored under.
+    get_cache().set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_public_events() -> None:
+    # Invalidate now for readers in this transaction, and again on commit so
+    # a concurrent reader cannot re-cache the pre-commit state.
+    bump_generation()
+    transaction.on_commit(bump_generation)
+
+
+def make_key(action: str, params: Dict[str, Any]) -> str:
+    raw: str = repr(sorted(params.items()))
+    digest: str = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'room:public-events:{get_generation()}:{action}:{digest}'
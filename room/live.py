@@ -0,0 +1,246 @@
+"""
+Live remaining capacity of public events, streamed as Server-Sent Events
+from the ASGI application (see room_manager.asgi):
+
+    GET /api/stream/capacity/?events=1,2,3
+
+Each message is ``{"event": <id>, "remaining_capacity": <n>}``, sent once
+for every event on connect and then whenever the number changes.
+"""
+import asyncio
+import json
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from room.models import Event, held_count
+
+STREAM_PATH: str = '/api/stream/capacity/'
+
+
+def get_live_settings() -> dict:
+    return settings.LIVE_CAPACITY
+
+
+def remaining_capacities(event_ids: List[int]) -> Dict[int, int]:
+    # One query for every event any client of this process follows; live
+    # holds count, so expired ones free their seat on the next poll.
+    close_old_connections()
+    return {
+        event.pk: event.remaining_capacity
+        for event in Event.objects.filter(
+            pk__in=event_ids,
+            is_public=True
+        ).select_related('room').annotate(
+            held_count=held_count()
+        ).only('pk', 'reserved_count', 'room__capacity')
+    }
+
+
+class Subscriber:
+    # Only the latest value per event is kept, so a slow client gets the
+    # current numbers rather than a backlog.
+    def __init__(self, event_ids: Set[int]) -> None:
+        self.event_ids: Set[int] = event_ids
+        self.pending: Dict[int, int] = {}
+        self.ready: asyncio.Event = asyncio.Event()
+
+    def push(self, event_id: int, remaining: int) -> None:
+        self.pending[event_id] = remaining
+        self.ready.set()
+
+    def pop(self) -> Dict[int, int]:
+        pending, self.pending = self.pending, {}
+        self.ready.clear()
+        return pending
+
+
+class CapacityBroadcaster:
+    """
+    The change source the subscribers of a process share. It re-reads the
+    followed events every ``POLL_SECONDS``, or at once when a reservation
+    in this process commits, and pushes the changed numbers.
+    """
+    def __init__(self) -> None:
+        self.subscribers: Dict[int, Set[Subscriber]] = {}
+        self.last: Dict[int, int] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self, event_ids: Set[int]) -> Subscriber:
+        subscriber: Subscriber = Subscriber(event_ids)
+        for event_id in event_ids:
+            self.subscribers.setdefault(event_id, set()).add(subscriber)
+            if event_id in self.last:
+                subscriber.push(event_id, self.last[event_id])
+
+        if self.task is None:
+            self.loop = asyncio.get_running_loop()
+            self.wakeup = asyncio.Event()
+            self.task = self.loop.create_task(self.run())
+
+        if not event_ids <= self.last.keys():
+            self.wakeup.set()
+
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for event_id in subscriber.event_ids:
+            followers: Set[Subscriber] = self.subscribers.get(event_id, set())
+            followers.discard(subscriber)
+            if not followers:
+                self.subscribers.pop(event_id, None)
+                self.last.pop(event_id, None)
+
+        if not self.subscribers and self.task is not None:
+            # Lets run() see there is no one left and stop.
+            self.wakeup.set()
+
+    def notify(self, event_ids: Iterable[int] = ()) -> None:
+        # Safe from any thread; a no-op in processes without subscribers, or
+        # when none follows the given events.
+        if self.task is None:
+            return
+
+        if event_ids and not any(
+            event_id in self.subscribers for event_id in event_ids
+        ):
+            return
+
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def run(self) -> None:
+        try:
+            while self.subscribers:
+                try:
+                    await asyncio.wait_for(
+                        self.wakeup.wait(),
+                        get_live_settings()['POLL_SECONDS']
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+
+                await self.refresh()
+        finally:
+            self.task = None
+            self.last.clear()
+
+    async def refresh(self) -> None:
+        event_ids: List[int] = list(self.subscribers)
+        if not event_ids:
+            return
+
+        current: Dict[int, int] = await sync_to_async(remaining_capacities)(
+            event_ids
+        )
+        for event_id, remaining in current.items():
+            if self.last.get(event_id) == remaining:
+                continue
+
+            self.last[event_id] = remaining
+            for subscriber in self.subscribers.get(event_id, ()):
+                subscriber.push(event_id, remaining)
+
+
+broadcaster: CapacityBroadcaster = CapacityBroadcaster()
+
+
+def notify_on_commit(event_ids: Iterable[int]) -> None:
+    # For changes made without the model signals, which notify on their own.
+    changed: Set[int] = set(event_ids)
+    transaction.on_commit(lambda: broadcaster.notify(changed))
+
+
+def parse_event_ids(query_string: bytes) -> Optional[Set[int]]:
+    values: List[str] = parse_qs(query_string.decode('latin-1')).get(
+        'events',
+        []
+    )
+    try:
+        event_ids: Set[int] = {
+            int(value)
+            for param in values
+            for value in param.split(',')
+            if value.strip()
+        }
+    except ValueError:
+        return None
+
+    if not event_ids or len(event_ids) > get_live_settings()['MAX_EVENTS']:
+        return None
+
+    return event_ids
+
+
+async def wait_for_disconnect(receive) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def capacity_stream(scope, receive, send) -> None:
+    event_ids: Optional[Set[int]] = parse_event_ids(scope['query_string'])
+    if scope['method'] != 'GET' or event_ids is None:
+        await send({
+            'type': 'http.response.start',
+            'status': 400,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': json.dumps({'detail': (
+                f"Pass up to {get_live_settings()['MAX_EVENTS']} event ids "
+                f"as ?events=1,2,3."
+            )}).encode(),
+        })
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    subscriber: Subscriber = broadcaster.subscribe(event_ids)
+    disconnect: asyncio.Task = asyncio.ensure_future(
+        wait_for_disconnect(receive)
+    )
+    try:
+        while True:
+            ready: asyncio.Task = asyncio.ensure_future(
+                subscriber.ready.wait()
+            )
+            await asyncio.wait(
+                (ready, disconnect),
+                timeout=get_live_settings()['KEEPALIVE_SECONDS'],
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            ready.cancel()
+            if disconnect.done():
+                return
+
+            body: bytes = b''.join(
+                b'data: ' + json.dumps({
+                    'event': event_id,
+                    'remaining_capacity': remaining,
+                }).encode() + b'\n\n'
+                for event_id, remaining in subscriber.pop().items()
+            )
+            await send({
+                'type': 'http.response.body',
+                # A comment line keeps idle proxies from closing the stream.
+                'body': body or b': keepalive\n\n',
+                'more_body': True,
+            })
+    finally:
+        disconnect.cancel()
+        broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,63 @@
+import datetime
+from typing import List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from room.models import Event
+from room.services import archive_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Move events that ended more than --days ago, and their "
+        "reservations, into the archive tables in batches."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Events per transaction."
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report how many events would be archived."
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        cutoff: datetime.datetime = timezone.now() - datetime.timedelta(
+            days=options['days']
+        )
+        # starts_at bounds the scan to a range of the (starts_at, id) index.
+        past = Event.objects.filter(starts_at__lt=cutoff, ends_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{past.count()} event(s) to archive.")
+            return
+
+        events: int = 0
+        reservations: int = 0
+        while True:
+            batch: List[int] = list(
+                past.order_by('starts_at', 'id').values_list(
+                    'pk',
+                    flat=True
+                )[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            moved_events, moved_reservations = archive_events(batch)
+            events += moved_events
+            reservations += moved_reservations
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {events} event(s) and {reservations} reservation(s)."
+        ))
@@ -0,0 +1,385 @@
+import bisect
+import csv
+import datetime
+import itertools
+import json
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    IO,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from room.cache import invalidate_public_events
+from room.models import (
+    Room,
+    Event,
+    Reservation,
+)
+from room.services import (
+    Slot,
+    booked_slots,
+    bulk_reserve,
+    slot_overlaps,
+)
+
+# (line number, raw row)
+Row = Tuple[int, Dict[str, Any]]
+
+# (line number, raw row or line, why it could not be read)
+ReadRow = Tuple[int, Any, Optional[str]]
+
+T = TypeVar('T')
+
+TRUE_VALUES: Set[str] = {'1', 'true', 't', 'yes', 'y'}
+
+
+def read_rows(path: str, format: Optional[str]) -> Iterator[ReadRow]:
+    # Lines that are not a JSON object are yielded with an error so they
+    # are rejected like any other invalid row.
+    if format is None:
+        format = 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+    with open(path, newline='') as f:
+        if format == 'csv':
+            # Line 1 is the header.
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row, None
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    data: Any = json.loads(line)
+                except ValueError as e:
+                    yield line_number, line.rstrip('\r\n'), (
+                        f"Invalid JSON: {e}."
+                    )
+                    continue
+
+                if not isinstance(data, dict):
+                    yield line_number, data, "Row must be a JSON object."
+                    continue
+
+                yield line_number, data, None
+
+
+def batched(rows: Iterator[T], size: int) -> Iterator[List[T]]:
+    while True:
+        batch: List[T] = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def as_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def as_datetime(value: Any) -> datetime.datetime:
+    # ISO 8601, naive values are in the current time zone.
+    parsed: datetime.datetime = datetime.datetime.fromisoformat(str(value))
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import rooms, events and reservations from CSV or NDJSON, "
+        "enforcing the booking rules in set-based passes per batch."
+    )
+
+    explicit_ids: bool = False
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--rooms', help="Rows of id?, name, capacity.")
+        parser.add_argument(
+            '--events',
+            help="Rows of id?, name, room, starts_at, ends_at, is_public?."
+        )
+        parser.add_argument(
+            '--reservations',
+            help="Rows of user, event (ids)."
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'ndjson'),
+            help="Defaults to the file extension."
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--rejects',
+            help="Write rejected rows here as NDJSON."
+        )
+
+    def handle(self, *args, **options) -> None:
+        if not any(options[name] for name in (
+            'rooms',
+            'events',
+            'reservations'
+        )):
+            raise CommandError(
+                "Nothing to import, pass --rooms, --events or --reservations."
+            )
+
+        self.rejects: Optional[IO] = None
+        if options['rejects']:
+            self.rejects = open(options['rejects'], 'w')
+
+        try:
+            # Parents first so later files can reference earlier ones.
+            for name, import_batch in (
+                ('rooms', self.import_rooms),
+                ('events', self.import_events),
+                ('reservations', self.import_reservations),
+            ):
+                if options[name]:
+                    self.import_file(
+                        name,
+                        options[name],
+                        options['format'],
+                        options['batch_size'],
+                        import_batch
+                    )
+        finally:
+            if self.rejects is not None:
+                self.rejects.close()
+
+        self.reset_sequences()
+        invalidate_public_events()
+
+    def import_file(
+        self,
+        name: str,
+        path: str,
+        format: Optional[str],
+        batch_size: int,
+        import_batch: Callable[[List[Row]], List[Tuple[Row, List[str]]]]
+    ) -> None:
+        started: float = time.perf_counter()
+        total: int = 0
+        rejected: int = 0
+
+        for batch in batched(read_rows(path, format), batch_size):
+            errors: List[Tuple[Row, List[str]]] = [
+                ((line, row), [error])
+                for line, row, error in batch
+                if error is not None
+            ]
+            with transaction.atomic():
+                errors += import_batch([
+                    (line, row)
+                    for line, row, error in batch
+                    if error is None
+                ])
+
+            total += len(batch)
+            rejected += len(errors)
+            for (line, row), messages in sorted(
+                errors,
+                key=lambda error: error[0][0]
+            ):
+                self.reject(name, line, row, messages)
+
+        elapsed: float = time.perf_counter() - started
+        rate: float = total / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{name}: {total - rejected} imported, {rejected} rejected, "
+            f"{elapsed:.1f}s ({rate:.0f} rows/s)"
+        )
+
+    def reject(
+        self,
+        name: str,
+        line: int,
+        row: Dict[str, Any],
+        messages: List[str]
+    ) -> None:
+        if self.rejects is None:
+            return
+
+        self.rejects.write(json.dumps({
+            'file': name,
+            'line': line,
+            'row': row,
+            'errors': messages,
+        }, default=str) + '\n')
+
+    def check_ids(
+        self,
+        model,
+        instances: List[Tuple[Row, Any]],
+        errors: List[Tuple[Row, List[str]]]
+    ) -> List[Tuple[Row, Any]]:
+        # Explicit ids must be new, both in the table and in the batch.
+        ids: Set[int] = {
+            instance.pk for _row, instance in instances if instance.pk
+        }
+        taken: Set[int] = set(
+            model.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+
+        accepted: List[Tuple[Row, Any]] = []
+        for row, instance in instances:
+            if instance.pk and instance.pk in taken:
+                errors.append((row, [f"Id {instance.pk} already exists."]))
+                continue
+
+            if instance.pk:
+                taken.add(instance.pk)
+                self.explicit_ids = True
+            accepted.append((row, instance))
+
+        return accepted
+
+    def import_rooms(self, batch: List[Row]) -> List[Tuple[Row, List[str]]]:
+        errors: List[Tuple[Row, List[str]]] = []
+        instances: List[Tuple[Row, Room]] = []
+
+        for row in batch:
+            _line, data = row
+            try:
+                room: Room = Room(
+                    id=data.get('id') or None,
+                    name=data.get('name'),
+                    capacity=data.get('capacity')
+                )
+                room.clean_fields()
+            except (ValidationError, TypeError, ValueError) as e:
+                errors.append((row, getattr(e, 'messages', [str(e)])))
+                continue
+            instances.append((row, room))
+
+        instances = self.check_ids(Room, instances, errors)
+        Room.objects.bulk_create([room for _row, room in instances])
+        return errors
+
+    def import_events(self, batch: List[Row]) -> List[Tuple[Row, List[str]]]:
+        errors: List[Tuple[Row, List[str]]] = []
+        instances: List[Tuple[Row, Event]] = []
+
+        for row in batch:
+            _line, data = row
+            try:
+                event: Event = Event(
+                    id=data.get('id') or None,
+                    name=data.get('name'),
+                    room_id=int(data.get('room')),
+                    starts_at=as_datetime(data.get('starts_at')),
+                    ends_at=as_datetime(data.get('ends_at')),
+                    is_public=as_bool(data.get('is_public', False))
+                )
+                event.clean_fields(exclude=('room', ))
+                event.clean_slot()
+            except (ValidationError, TypeError, ValueError) as e:
+                errors.append((row, getattr(e, 'messages', [str(e)])))
+                continue
+            instances.append((row, event))
+
+        instances = self.check_ids(Event, instances, errors)
+
+        # One query for the rooms and one for the slots already booked
+        # around the batch, the same rule as room_event_room_overlap_excl.
+        room_ids: Set[int] = {event.room_id for _row, event in instances}
+        rooms: Set[int] = set(
+            Room.objects.filter(pk__in=room_ids).values_list('pk', flat=True)
+        )
+        booked: Dict[int, List[Slot]] = booked_slots(
+            room_ids,
+            [(event.starts_at, event.ends_at) for _row, event in instances]
+        )
+
+        accepted: List[Event] = []
+        for row, event in instances:
+            slot: Slot = (event.starts_at, event.ends_at)
+            if event.room_id not in rooms:
+                errors.append((row, ["Room does not exist."]))
+            elif slot_overlaps(booked[event.room_id], slot):
+                errors.append((row, ["Room is booked at that time."]))
+            else:
+                bisect.insort(booked[event.room_id], slot)
+                accepted.append(event)
+
+        Event.objects.bulk_create(accepted)
+        return errors
+
+    def import_reservations(
+        self,
+        batch: List[Row]
+    ) -> List[Tuple[Row, List[str]]]:
+        errors: List[Tuple[Row, List[str]]] = []
+        pairs: List[Tuple[int, int]] = []
+        parsed: List[Row] = []
+
+        for row in batch:
+            _line, data = row
+            try:
+                pairs.append((int(data['user']), int(data['event'])))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append((row, [f"Invalid row: {e}."]))
+                continue
+            parsed.append(row)
+
+        # Capacity, duplicates and existence in a fixed number of queries.
+        for row, result in zip(parsed, bulk_reserve(pairs, notify=False)):
+            if isinstance(result, ValidationError):
+                errors.append((row, result.messages))
+
+        return errors
+
+    def reset_sequences(self) -> None:
+        if not self.explicit_ids:
+            return
+
+        models: List[type] = [Room, Event, Reservation]
+        if connection.vendor != 'postgresql':
+            statements: List[str] = connection.ops.sequence_reset_sql(
+                no_style(),
+                models
+            )
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+            return
+
+        # Only ever moves a sequence forward: ids above the table's max may
+        # belong to rows archive_events moved out of it.
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in models:
+                table: str = model._meta.db_table
+                column: str = model._meta.pk.column
+                cursor.execute(
+                    'SELECT pg_get_serial_sequence(%s, %s)',
+                    [table, column]
+                )
+                sequence: Optional[str] = cursor.fetchone()[0]
+                if sequence is None:
+                    continue
+
+                cursor.execute(
+                    f'SELECT setval(%s, GREATEST('
+                    f'(SELECT last_value FROM {sequence}), '
+                    f'(SELECT MAX({quote(column)}) FROM {quote(table)})'
+                    f'))',
+                    [sequence]
+                )
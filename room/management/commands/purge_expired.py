@@ -0,0 +1,73 @@
+import datetime
+from typing import List, Set, Tuple, Type
+
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.utils import timezone
+
+from room.models import IdempotencyKey, SeatHold, WaitlistEntry
+from room.services import promote_waitlist
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired seat holds and idempotency keys, and hand the seats "
+        "of the holds to the waitlist. Expired rows already have no effect, "
+        "this only reclaims them."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.batch_size: int = options['batch_size']
+        self.now: datetime.datetime = timezone.now()
+
+        holds: List[Tuple[int, int]] = self.purge(SeatHold, 'event_id')
+        event_ids: Set[int] = {event_id for _pk, event_id in holds}
+        waiting: List[int] = list(
+            WaitlistEntry.objects.filter(
+                event_id__in=event_ids
+            ).order_by('event_id').values_list(
+                'event_id',
+                flat=True
+            ).distinct()
+        )
+        for event_id in waiting:
+            promote_waitlist(event_id)
+
+        keys: List[Tuple[int]] = self.purge(IdempotencyKey)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {len(holds)} expired hold(s) and {len(keys)} "
+            f"idempotency key(s), promoted the waitlist of {len(waiting)} "
+            f"event(s)."
+        ))
+
+    def purge(self, model: Type[models.Model], *fields: str) -> List[tuple]:
+        # Deletes expired rows in batches, each a range of the expires_at
+        # index, never a scan of live rows. Returns (pk, *fields) of each.
+        purged: List[tuple] = []
+
+        while True:
+            batch: List[tuple] = list(
+                model.objects.filter(
+                    expires_at__lte=self.now
+                ).order_by('expires_at').values_list('pk', *fields)[
+                    :self.batch_size
+                ]
+            )
+            if not batch:
+                return purged
+
+            # Rows renewed since the read, such as a key taken over by a
+            # retried request, are live again and must stay.
+            model.objects.filter(
+                pk__in=[row[0] for row in batch],
+                expires_at__lte=self.now
+            ).delete()
+            purged.extend(batch)
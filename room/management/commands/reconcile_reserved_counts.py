@@ -0,0 +1,56 @@
+from typing import List
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from room.models import Event
+from room.services import reservation_count
+
+
+class Command(BaseCommand):
+    help = "Recompute Event.reserved_count for events that drifted."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report drifted events."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000
+        )
+
+    def handle(self, *args, **options) -> None:
+        drifted: List[int] = list(
+            Event.objects.annotate(
+                actual=reservation_count()
+            ).exclude(
+                reserved_count=F('actual')
+            ).values_list('pk', flat=True)
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} event(s) drifted.")
+            return
+
+        batch_size: int = options['batch_size']
+        for i in range(0, len(drifted), batch_size):
+            batch: List[int] = drifted[i:i + batch_size]
+
+            with transaction.atomic():
+                # Lock first so the recount cannot interleave with bookings.
+                list(
+                    Event.objects.select_for_update().filter(
+                        pk__in=batch
+                    ).values_list('pk', flat=True)
+                )
+                Event.objects.filter(pk__in=batch).update(
+                    reserved_count=reservation_count()
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled {len(drifted)} event(s).")
+        )
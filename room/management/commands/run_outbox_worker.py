@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from django.core.management.base import BaseCommand
+
+from room.models import OutboxMessage
+from room.outbox import claim, complete, deliver, get_outbox_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver outbox messages to their handlers. Any number of workers "
+        "can run side by side, each claims its own batches."
+    )
+
+    def add_arguments(self, parser) -> None:
+        options: dict = get_outbox_settings()
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=options['BATCH_SIZE']
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=options['WORKERS'],
+            help="Threads running handlers."
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit when no message is due instead of polling."
+        )
+
+    def handle(self, *args, **options) -> None:
+        poll: float = get_outbox_settings()['POLL_SECONDS']
+        delivered: int = 0
+        failed: int = 0
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                messages: List[OutboxMessage] = claim(options['batch_size'])
+                if not messages:
+                    if options['once']:
+                        break
+
+                    time.sleep(poll)
+                    continue
+
+                results: Dict[OutboxMessage, Optional[str]] = dict(
+                    zip(messages, pool.map(deliver, messages))
+                )
+                complete(results)
+
+                errors: int = sum(
+                    error is not None for error in results.values()
+                )
+                delivered += len(results) - errors
+                failed += errors
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {delivered} message(s), {failed} failed."
+        ))
@@ -0,0 +1,231 @@
+import datetime
+import random
+import time
+from typing import Iterator, List, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from room.cache import invalidate_public_events
+from room.models import (
+    Room,
+    Event,
+    Reservation,
+)
+from room.services import local_datetime
+
+# (low, high, weight) of room capacities: mostly small rooms, a few halls.
+ROOM_SIZES: Tuple[Tuple[int, int, int], ...] = (
+    (10, 30, 60),
+    (30, 100, 30),
+    (100, 500, 10),
+)
+
+# Each room hosts up to this many sessions a day, from 08:00, every two
+# hours, each one to two hours long.
+SESSIONS: int = 5
+SESSION_START: datetime.time = datetime.time(8)
+SESSION_STEP: datetime.timedelta = datetime.timedelta(hours=2)
+SESSION_LENGTHS: Tuple[int, ...] = (60, 90, 120)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk generate a synthetic data set of users, rooms, events and "
+        "reservations, deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--rooms', type=int, default=100)
+        parser.add_argument('--events', type=int, default=10_000)
+        parser.add_argument(
+            '--reservations',
+            type=int,
+            default=200_000,
+            help=(
+                "Target total; popular events sell out, so the actual "
+                "count ends up lower."
+            )
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--popularity',
+            type=float,
+            default=1.2,
+            help="Pareto shape of event popularity, lower is more skewed."
+        )
+        parser.add_argument('--public-ratio', type=float, default=0.6)
+        parser.add_argument(
+            '--start',
+            type=datetime.date.fromisoformat,
+            default=datetime.date.today(),
+            help="Date of the first events, ISO format."
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help="Username prefix, change it to seed the same database again."
+        )
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options) -> None:
+        if options['rooms'] < 1 or options['users'] < 1:
+            raise CommandError("--rooms and --users must be at least 1.")
+
+        if User.objects.filter(
+            username__startswith=f"{options['prefix']}-"
+        ).exists():
+            raise CommandError(
+                f"Users prefixed {options['prefix']!r} exist, pass --prefix."
+            )
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size: int = options['batch_size']
+        started: float = time.perf_counter()
+
+        user_ids: List[int] = self.create_users(
+            options['users'],
+            options['prefix'],
+            options['password']
+        )
+        rooms: List[Room] = self.create_rooms(options['rooms'])
+
+        reserved: int = 0
+        events: Iterator[List[Tuple[Event, int]]] = self.generate_events(
+            rooms,
+            options['events'],
+            options['reservations'],
+            options['popularity'],
+            options['public_ratio'],
+            options['start'],
+            len(user_ids)
+        )
+        for batch in events:
+            with transaction.atomic():
+                reserved += self.create_batch(batch, user_ids)
+
+        invalidate_public_events()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(user_ids)} user(s), {len(rooms)} room(s), "
+            f"{options['events']} event(s) and {reserved} reservation(s) "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def create_users(
+        self,
+        total: int,
+        prefix: str,
+        password: str
+    ) -> List[int]:
+        # Hashing is deliberately slow, every user shares the one hash.
+        hashed: str = make_password(password)
+        user_ids: List[int] = []
+
+        for start in range(0, total, self.batch_size):
+            users: List[User] = User.objects.bulk_create(
+                User(username=f'{prefix}-{i}', password=hashed)
+                for i in range(start, min(start + self.batch_size, total))
+            )
+            user_ids.extend(user.pk for user in users)
+
+        return user_ids
+
+    def create_rooms(self, total: int) -> List[Room]:
+        rooms: List[Room] = []
+        for i in range(total):
+            low, high, _weight = self.rng.choices(
+                ROOM_SIZES,
+                weights=[weight for _low, _high, weight in ROOM_SIZES]
+            )[0]
+            rooms.append(
+                Room(name=f'room {i}', capacity=self.rng.randint(low, high))
+            )
+
+        return Room.objects.bulk_create(rooms, batch_size=self.batch_size)
+
+    def generate_events(
+        self,
+        rooms: List[Room],
+        total: int,
+        reservations: int,
+        popularity: float,
+        public_ratio: float,
+        start: datetime.date,
+        users: int
+    ) -> Iterator[List[Tuple[Event, int]]]:
+        """
+        Yield batches of unsaved events with the number of reservations each
+        should get. Reservations are shared out by a Pareto popularity
+        weight and capped at capacity, so popular events sell out, some
+        come close and the long tail gets a handful each.
+        """
+        weights: List[float] = [
+            self.rng.paretovariate(popularity) for _i in range(total)
+        ]
+        share: float = reservations / sum(weights) if weights else 0.0
+
+        batch: List[Tuple[Event, int]] = []
+        for i, weight in enumerate(weights):
+            # Rooms are filled session by session, so slots never overlap.
+            room: Room = rooms[i % len(rooms)]
+            day, session = divmod(i // len(rooms), SESSIONS)
+            starts_at: datetime.datetime = local_datetime(
+                start + datetime.timedelta(days=day),
+                SESSION_START
+            ) + session * SESSION_STEP
+            wanted: int = int(weight * share + self.rng.random())
+            booked: int = min(wanted, room.capacity, users)
+
+            batch.append((
+                Event(
+                    name=f'event {i}',
+                    room=room,
+                    starts_at=starts_at,
+                    ends_at=starts_at + datetime.timedelta(
+                        minutes=self.rng.choice(SESSION_LENGTHS)
+                    ),
+                    is_public=self.rng.random() < public_ratio,
+                    reserved_count=booked
+                ),
+                booked
+            ))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def create_batch(
+        self,
+        batch: List[Tuple[Event, int]],
+        user_ids: List[int]
+    ) -> int:
+        events: List[Event] = Event.objects.bulk_create(
+            event for event, _booked in batch
+        )
+
+        reservations: List[Reservation] = []
+        total: int = 0
+        for event, (_event, booked) in zip(events, batch):
+            # A run of consecutive users from a random offset, so the users
+            # of one event are distinct.
+            offset: int = self.rng.randrange(len(user_ids))
+            for i in range(booked):
+                reservations.append(Reservation(
+                    event_id=event.pk,
+                    user_id=user_ids[(offset + i) % len(user_ids)]
+                ))
+
+            if len(reservations) >= self.batch_size:
+                Reservation.objects.bulk_create(reservations)
+                total += len(reservations)
+                reservations = []
+
+        Reservation.objects.bulk_create(reservations)
+        return total + len(reservations)
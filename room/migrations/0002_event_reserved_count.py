@@ -0,0 +1,35 @@
+# Generated by Django 4.1.7 on 2026-10-17 05:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reserved_count(apps, schema_editor):
+    Event = apps.get_model('room', 'Event')
+    Reservation = apps.get_model('room', 'Reservation')
+
+    counts = Reservation.objects.filter(
+        event=OuterRef('pk')
+    ).order_by().values('event').annotate(n=Count('pk')).values('n')
+
+    Event.objects.update(reserved_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='reserved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_reserved_count,
+            migrations.RunPython.noop
+        ),
+    ]
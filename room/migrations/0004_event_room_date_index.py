@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-17 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['room', 'date'], name='room_event_room_date_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.7 on 2026-10-17 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0004_event_room_date_index'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='room_event_room_date_unique', violation_error_message='Room has event on that day.'),
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='room_event_room_date_idx',
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.1.7 on 2026-10-17 07:12
+
+import datetime
+
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+from django.db.models import DateField, DateTimeField, F
+from django.db.models.functions import Cast
+
+import room_manager.constraints
+
+
+def backfill_time_slots(apps, schema_editor):
+    # One event per room and day becomes a whole-day slot, so the existing
+    # rows satisfy the overlap constraint.
+    Event = apps.get_model('room', 'Event')
+
+    Event.objects.update(starts_at=Cast('date', DateTimeField()))
+    Event.objects.update(ends_at=F('starts_at') + datetime.timedelta(days=1))
+
+
+def backfill_date(apps, schema_editor):
+    Event = apps.get_model('room', 'Event')
+
+    Event.objects.update(date=Cast('starts_at', DateField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0006_waitlistentry'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='ends_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(
+            backfill_time_slots,
+            backfill_date
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='ends_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.RemoveConstraint(
+            model_name='event',
+            name='room_event_room_date_unique',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='room_event_date_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='room_event_public_date_id_idx',
+        ),
+        migrations.RemoveField(
+            model_name='event',
+            name='date',
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['starts_at', 'id'], name='room_event_starts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_public', 'starts_at', 'id'], name='room_event_public_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['room', 'starts_at'], name='room_event_room_starts_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.CheckConstraint(check=models.Q(('ends_at__gt', models.F('starts_at'))), name='room_event_ends_after_starts', violation_error_message='Event ends before it starts.'),
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=room_manager.constraints.PostgresExclusionConstraint(expressions=((room_manager.constraints.TsTzRange('starts_at', 'ends_at', django.contrib.postgres.fields.ranges.RangeBoundary()), '&&'), ('room', '=')), name='room_event_room_overlap_excl', violation_error_message='Room is booked at that time.'),
+        ),
+    ]
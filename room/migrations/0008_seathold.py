@@ -0,0 +1,39 @@
+# Generated by Django 4.1.7 on 2026-10-17 06:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('room', '0007_event_time_slots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='room.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['event', 'expires_at'], name='room_seathold_event_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['expires_at'], name='room_seathold_expires_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='seathold',
+            unique_together={('user', 'event')},
+        ),
+    ]
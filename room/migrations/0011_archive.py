@@ -0,0 +1,57 @@
+# Generated by Django 4.1.7 on 2026-10-17 06:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('room', '0010_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=225)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('is_public', models.BooleanField()),
+                ('reserved_count', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='room.room')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedReservation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='room.archivedevent')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedreservation',
+            index=models.Index(fields=['created_at', 'id'], name='room_archres_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedreservation',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='room_archres_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedevent',
+            index=models.Index(fields=['starts_at', 'id'], name='room_archevent_starts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedevent',
+            index=models.Index(fields=['is_public', 'starts_at', 'id'], name='room_archevent_public_idx'),
+        ),
+    ]
@@ -1,12 +1,63 @@
 import datetime
+from typing import Optional
 
-from django.db import models
+from django.db import models, router
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import RangeBoundary, RangeOperators
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from room_manager.constraints import (
+    PostgresExclusionConstraint,
+    TsTzRange,
+    has_exclusion_constraints,
+)
 from room_manager.models import BaseModel
 
+# Upper bound on an event's length. It bounds starts_at on both sides of an
+# overlap lookup, so the (room, starts_at) index answers it as a range scan.
+MAX_EVENT_DURATION: datetime.timedelta = datetime.timedelta(days=1)
+
+
+class EventFull(ValidationError):
+    pass
+
+
+def overlapping(
+    starts_at: datetime.datetime,
+    ends_at: datetime.datetime,
+    prefix: str = ''
+) -> models.Q:
+    # Half-open ranges: an event ending at 10:00 does not overlap one
+    # starting at 10:00.
+    return models.Q(**{
+        f'{prefix}starts_at__gt': starts_at - MAX_EVENT_DURATION,
+        f'{prefix}starts_at__lt': ends_at,
+        f'{prefix}ends_at__gt': starts_at,
+    })
+
+
+def held_count(holder: Optional[User] = None) -> Coalesce:
+    # Per-event COUNT(*) of live holds, other than the holder's own, from a
+    # range of the (event, expires_at) index. Expired holds simply stop
+    # matching, they never have to be deleted for the seat to free up.
+    holds = SeatHold.objects.filter(
+        event=models.OuterRef('pk'),
+        expires_at__gt=timezone.now()
+    )
+    if holder is not None:
+        holds = holds.exclude(user=holder)
+
+    counts: models.Subquery = models.Subquery(
+        holds.order_by().values('event').annotate(
+            n=models.Count('pk')
+        ).values('n')
+    )
+    return Coalesce(counts, 0)
+
 
 class Room(BaseModel):
     name: str = models.CharField(max_length=225)
@@ -15,6 +66,8 @@ class Room(BaseModel):
 
 class Event(BaseModel):
     reservations: models.QuerySet  # room.models.Reservation.
+    waitlist: models.QuerySet  # room.models.WaitlistEntry.
+    holds: models.QuerySet  # room.models.SeatHold.
 
     name: str = models.CharField(max_length=225)
     room: Room = models.ForeignKey(
@@ -23,18 +76,91 @@ class Event(BaseModel):
         related_name='events'
     )
     is_public: bool = models.BooleanField(default=False)
-    date: datetime.date = models.DateField()
+    starts_at: datetime.datetime = models.DateTimeField()
+    ends_at: datetime.datetime = models.DateTimeField()
+    reserved_count: int = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
 
-    def clean(self) -> None:
-        qs: models.QuerySet = self.__class__.objects.filter(
-            date=self.date,
-            room=self.room
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('starts_at', 'id'),
+                name='room_event_starts_id_idx'
+            ),
+            models.Index(
+                fields=('is_public', 'starts_at', 'id'),
+                name='room_event_public_start_idx'
+            ),
+            models.Index(
+                fields=('room', 'starts_at'),
+                name='room_event_room_starts_idx'
+            ),
+        )
+        constraints = (
+            models.CheckConstraint(
+                check=models.Q(ends_at__gt=models.F('starts_at')),
+                name='room_event_ends_after_starts',
+                violation_error_message=_("Event ends before it starts.")
+            ),
+            PostgresExclusionConstraint(
+                name='room_event_room_overlap_excl',
+                expressions=(
+                    (
+                        TsTzRange('starts_at', 'ends_at', RangeBoundary()),
+                        RangeOperators.OVERLAPS
+                    ),
+                    ('room', RangeOperators.EQUAL),
+                ),
+                violation_error_message=_("Room is booked at that time.")
+            ),
         )
-        if qs.exists():
-            raise ValidationError(_("Room has event on that day."))
+
+    @property
+    def remaining_capacity(self) -> int:
+        # held_count is annotated where live holds have to count, see
+        # room.services.lock_event().
+        held: int = getattr(self, 'held_count', 0)
+        return max(self.room.capacity - self.reserved_count - held, 0)
+
+    def clean(self) -> None:
+        self.clean_slot()
+
+        if self.room_id is not None and self.needs_overlap_check():
+            if self.has_overlap():
+                raise ValidationError(_("Room is booked at that time."))
 
         return super().clean()
 
+    def clean_slot(self) -> None:
+        if self.starts_at is None or self.ends_at is None:
+            return
+
+        if self.ends_at <= self.starts_at:
+            raise ValidationError(_("Event ends before it starts."))
+
+        if self.ends_at - self.starts_at > MAX_EVENT_DURATION:
+            raise ValidationError(
+                _("Event is longer than %(n)d hours.") % {
+                    'n': MAX_EVENT_DURATION // datetime.timedelta(hours=1)
+                }
+            )
+
+    def needs_overlap_check(self) -> bool:
+        # Where room_event_room_overlap_excl exists it enforces this on
+        # write, see EventSerializer.raise_overlap(); elsewhere the query
+        # is all there is.
+        return not has_exclusion_constraints(
+            router.db_for_write(self.__class__, instance=self)
+        )
+
+    def has_overlap(self) -> bool:
+        return self.__class__.objects.filter(
+            overlapping(self.starts_at, self.ends_at),
+            room_id=self.room_id
+        ).exclude(pk=self.pk).exists()
+
 
 class Reservation(BaseModel):
     user: User = models.ForeignKey(
@@ -49,12 +175,186 @@ class Reservation(BaseModel):
 
     class Meta:
         unique_together = (('user', 'event'), )
+        indexes = (
+            models.Index(
+                fields=('created_at', 'id'),
+                name='room_reservation_created_idx'
+            ),
+            models.Index(
+                fields=('user', 'created_at', 'id'),
+                name='room_reservation_user_idx'
+            ),
+        )
 
     def clean(self) -> None:
-        room: Room = self.event.room
-        n_reservations: int = self.event.reservations.all().count()
-
-        if n_reservations >= room.capacity:
-            raise ValidationError(_("Room has no more capacity."))
+        if self.event.remaining_capacity <= 0:
+            raise EventFull(_("Room has no more capacity."))
 
         return super().clean()
+
+
+class WaitlistEntry(BaseModel):
+    user: User = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+    )
+    event: Event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='waitlist'
+    )
+
+    class Meta:
+        unique_together = (('user', 'event'), )
+        indexes = (
+            models.Index(
+                fields=('event', 'id'),
+                name='room_waitlist_event_id_idx'
+            ),
+        )
+
+    def get_position(self) -> int:
+        return self.__class__.objects.filter(
+            event_id=self.event_id,
+            id__lte=self.id
+        ).count()
+
+
+class SeatHold(BaseModel):
+    user: User = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+    )
+    event: Event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='holds'
+    )
+    expires_at: datetime.datetime = models.DateTimeField()
+
+    class Meta:
+        unique_together = (('user', 'event'), )
+        indexes = (
+            # Live holds of an event are a range of this index, expired ones
+            # are never read.
+            models.Index(
+                fields=('event', 'expires_at'),
+                name='room_seathold_event_exp_idx'
+            ),
+            models.Index(
+                fields=('expires_at', ),
+                name='room_seathold_expires_idx'
+            ),
+        )
+
+
+class IdempotencyKey(BaseModel):
+    # A create request's Idempotency-Key and, once it succeeded, its
+    # response; a retry with the same key gets the response back instead of
+    # running again. status_code is null while the first request is running.
+    user: User = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+    )
+    key: str = models.CharField(max_length=255)
+    fingerprint: str = models.CharField(max_length=64)
+    status_code: int = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    expires_at: datetime.datetime = models.DateTimeField()
+
+    class Meta:
+        unique_together = (('user', 'key'), )
+        indexes = (
+            models.Index(
+                fields=('expires_at', ),
+                name='room_idempotency_expires_idx'
+            ),
+        )
+
+
+class OutboxMessage(BaseModel):
+    # A side effect of a model change, written in the change's transaction
+    # and delivered to the handlers of its topic by run_outbox_worker.
+    # Delivered messages are deleted; available_at is null once a message
+    # ran out of attempts.
+    topic: str = models.CharField(max_length=100)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    attempts: int = models.PositiveIntegerField(default=0)
+    available_at: datetime.datetime = models.DateTimeField(
+        null=True,
+        default=timezone.now
+    )
+    last_error: str = models.TextField(blank=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('available_at', 'id'),
+                name='room_outbox_available_idx'
+            ),
+        )
+
+
+class ArchivedEvent(models.Model):
+    # A past Event moved out of the live tables by archive_events. Keeps
+    # the original id and timestamps; rows are never written otherwise.
+    reservations: models.QuerySet  # room.models.ArchivedReservation.
+
+    id: int = models.BigIntegerField(primary_key=True)
+    name: str = models.CharField(max_length=225)
+    room: Room = models.ForeignKey(
+        Room,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    starts_at: datetime.datetime = models.DateTimeField()
+    ends_at: datetime.datetime = models.DateTimeField()
+    is_public: bool = models.BooleanField()
+    reserved_count: int = models.PositiveIntegerField()
+    created_at: datetime.datetime = models.DateTimeField()
+    updated_at: datetime.datetime = models.DateTimeField()
+    archived_at: datetime.datetime = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('starts_at', 'id'),
+                name='room_archevent_starts_idx'
+            ),
+            models.Index(
+                fields=('is_public', 'starts_at', 'id'),
+                name='room_archevent_public_idx'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ArchivedReservation(models.Model):
+    id: int = models.BigIntegerField(primary_key=True)
+    user: User = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name='+'
+    )
+    event: ArchivedEvent = models.ForeignKey(
+        ArchivedEvent,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+    created_at: datetime.datetime = models.DateTimeField()
+    updated_at: datetime.datetime = models.DateTimeField()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('created_at', 'id'),
+                name='room_archres_created_idx'
+            ),
+            models.Index(
+                fields=('user', 'created_at', 'id'),
+                name='room_archres_user_idx'
+            ),
+        )
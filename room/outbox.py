@@ -0,0 +1,138 @@
+import datetime
+import logging
+import traceback
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from room.models import OutboxMessage
+
+# Topics written by room.signals and room.services.
+RESERVATION_CREATED: str = 'reservation.created'
+RESERVATION_DELETED: str = 'reservation.deleted'
+EVENT_RESCHEDULED: str = 'event.rescheduled'
+
+Handler = Callable[[OutboxMessage], None]
+
+logger = logging.getLogger(__name__)
+
+
+def get_outbox_settings() -> dict:
+    return settings.OUTBOX
+
+
+def get_handlers(topic: str) -> List[Handler]:
+    return [
+        import_string(path)
+        for path in get_outbox_settings()['HANDLERS'].get(topic, ())
+    ]
+
+
+def enqueue(topic: str, payload: dict) -> OutboxMessage:
+    # Must run in the transaction of the change it reports, so the message
+    # is committed or rolled back with it.
+    return OutboxMessage.objects.create(topic=topic, payload=payload)
+
+
+def enqueue_many(messages: Iterable[Tuple[str, dict]]) -> None:
+    OutboxMessage.objects.bulk_create(
+        OutboxMessage(topic=topic, payload=payload)
+        for topic, payload in messages
+    )
+
+
+def reservation_payload(reservation) -> dict:
+    return {
+        'reservation': reservation.pk,
+        'user': reservation.user_id,
+        'event': reservation.event_id,
+    }
+
+
+def claim(batch_size: int) -> List[OutboxMessage]:
+    """
+    Lease up to ``batch_size`` due messages to this worker. Rows another
+    worker is claiming are skipped rather than waited for, and the lease
+    keeps them from being claimed again until it runs out, so a crashed
+    worker's messages are retried.
+    """
+    now: datetime.datetime = timezone.now()
+
+    with transaction.atomic():
+        messages: List[OutboxMessage] = list(
+            OutboxMessage.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                available_at__lte=now
+            ).order_by('available_at', 'id')[:batch_size]
+        )
+        OutboxMessage.objects.filter(
+            pk__in=[message.pk for message in messages]
+        ).update(
+            attempts=F('attempts') + 1,
+            available_at=now + datetime.timedelta(
+                seconds=get_outbox_settings()['LEASE_SECONDS']
+            ),
+            updated_at=now
+        )
+
+    for message in messages:
+        message.attempts += 1
+
+    return messages
+
+
+def deliver(message: OutboxMessage) -> Optional[str]:
+    # Runs in a worker thread; returns the error of a failed delivery.
+    try:
+        for handler in get_handlers(message.topic):
+            handler(message)
+    except Exception:
+        logger.exception("Outbox message %s failed.", message.pk)
+        return traceback.format_exc()
+    finally:
+        close_old_connections()
+
+    return None
+
+
+def get_backoff(attempts: int) -> datetime.timedelta:
+    options: dict = get_outbox_settings()
+    return datetime.timedelta(seconds=min(
+        options['BACKOFF_SECONDS'] * 2 ** (attempts - 1),
+        options['MAX_BACKOFF_SECONDS']
+    ))
+
+
+def complete(results: Dict[OutboxMessage, Optional[str]]) -> None:
+    # Delivered messages are deleted in one query; failed ones are retried
+    # after an exponential backoff until MAX_ATTEMPTS.
+    OutboxMessage.objects.filter(pk__in=[
+        message.pk for message, error in results.items() if error is None
+    ]).delete()
+
+    now: datetime.datetime = timezone.now()
+    for message, error in results.items():
+        if error is None:
+            continue
+
+        exhausted: bool = (
+            message.attempts >= get_outbox_settings()['MAX_ATTEMPTS']
+        )
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            available_at=None if exhausted else now + get_backoff(
+                message.attempts
+            ),
+            last_error=error,
+            updated_at=now
+        )
+
+
+def log_message(message: OutboxMessage) -> None:
+    # Default handler; notifications and calendar sync plug in next to it
+    # through settings.OUTBOX['HANDLERS'].
+    logger.info("%s %s", message.topic, message.payload)
@@ -0,0 +1,23 @@
+from typing import Tuple
+
+from room_manager.pagination import KeysetPagination
+
+
+class UserPagination(KeysetPagination):
+    ordering: Tuple[str, ...] = ('id', )
+    max_page_size: int = 200
+
+
+class RoomPagination(KeysetPagination):
+    ordering: Tuple[str, ...] = ('id', )
+    max_page_size: int = 200
+
+
+class EventPagination(KeysetPagination):
+    ordering: Tuple[str, ...] = ('starts_at', 'id')
+    max_page_size: int = 200
+
+
+class ReservationPagination(KeysetPagination):
+    ordering: Tuple[str, ...] = ('created_at', 'id')
+    max_page_size: int = 500
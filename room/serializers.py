@@ -1,18 +1,102 @@
+import copy
+import datetime
+from typing import Callable, Dict, List, Tuple
+
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
 
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
 
 from room.models import (
     Room,
     Event,
     Reservation,
+    SeatHold,
+    WaitlistEntry,
+    ArchivedEvent,
+    ArchivedReservation,
+)
+from room.services import (
+    SERIES_FREQUENCIES,
+    count_series,
+    expand_series,
+    local_datetime,
+    move_reservation,
+    reserve,
 )
 
 
+class Waitlisted(Exception):
+    # Raised by ReservationSerializer.save() when the event was full and the
+    # user was queued instead; carries the WaitlistEntry.
+    def __init__(self, entry: WaitlistEntry) -> None:
+        super().__init__(entry)
+        self.entry = entry
+
+
+def get_query_list(request, param: str) -> List[str]:
+    if request is None:
+        return []
+
+    return [
+        name.strip()
+        for name in request.query_params.get(param, '').split(',')
+        if name.strip()
+    ]
+
+
+class DynamicFieldsSerializerMixin:
+    # Reads ``?fields=a,b`` and ``?expand=x,y`` on safe requests: expanded
+    # fields are replaced by the nested serializer from expandable_fields,
+    # and the rest is trimmed to the requested fields.
+    expandable_fields: Dict[str, Callable[[], serializers.Serializer]] = {}
+
+    def is_dynamic_root(self) -> bool:
+        if self.parent is None:
+            return True
+
+        return (
+            isinstance(self.parent, serializers.ListSerializer)
+            and self.parent.parent is None
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+            or not self.is_dynamic_root()
+        ):
+            return fields
+
+        for name in get_query_list(request, 'expand'):
+            if name in self.expandable_fields and name in fields:
+                fields[name] = self.expandable_fields[name]()
+
+        requested: List[str] = get_query_list(request, 'fields')
+        if requested:
+            for name in set(fields) - set(requested):
+                fields.pop(name)
+
+        return fields
+
+
 class ValidateWithCleanSerializerMixin:
     def validate(self, data):
-        instance = self.Meta.model(**data)
+        if self.instance is None:
+            instance = self.Meta.model(**data)
+        else:
+            # Partial updates are checked as they will be saved, over the
+            # stored values and under the same pk.
+            instance = copy.copy(self.instance)
+            for name, value in data.items():
+                setattr(instance, name, value)
 
         try:
             instance.clean()
@@ -22,7 +106,62 @@ class ValidateWithCleanSerializerMixin:
         return super().validate(data)
 
 
+class HyperlinkedIdField(serializers.HyperlinkedRelatedField):
+    # Resolves a hyperlink (or a bare pk) to the pk without fetching the row,
+    # so callers can look up many objects in one query.
+    def get_object(self, view_name, view_args, view_kwargs) -> int:
+        try:
+            return int(view_kwargs[self.lookup_url_kwarg])
+        except ValueError:
+            raise ObjectDoesNotExist
+
+    def to_internal_value(self, data) -> int:
+        if isinstance(data, int) and not isinstance(data, bool):
+            return data
+
+        return super().to_internal_value(data)
+
+
+class CachedHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+    # reverse() runs once per (view, format) and request with a placeholder
+    # pk; every other link is built by substituting the pk into that URL.
+    placeholder: str = 'hyperlink-pk-placeholder'
+
+    def get_url(self, obj, view_name, request, format):
+        if hasattr(obj, 'pk') and obj.pk in (None, ''):
+            return None
+
+        lookup_value = getattr(obj, self.lookup_field)
+        if request is None or not isinstance(lookup_value, int):
+            return super().get_url(obj, view_name, request, format)
+
+        templates: dict = getattr(request, '_hyperlink_templates', None)
+        if templates is None:
+            templates = request._hyperlink_templates = {}
+
+        key: tuple = (view_name, format, self.lookup_url_kwarg)
+        if key not in templates:
+            url: str = self.reverse(
+                view_name,
+                kwargs={self.lookup_url_kwarg: self.placeholder},
+                request=request,
+                format=format
+            )
+            prefix, _placeholder, suffix = url.rpartition(self.placeholder)
+            templates[key] = (prefix, suffix)
+
+        prefix, suffix = templates[key]
+        return f'{prefix}{lookup_value}{suffix}'
+
+
+class CachedHyperlinkedModelSerializer(
+    serializers.HyperlinkedModelSerializer
+):
+    serializer_related_field = CachedHyperlinkedRelatedField
+
+
 class UserSerializer(
+    DynamicFieldsSerializerMixin,
     ValidateWithCleanSerializerMixin,
     serializers.ModelSerializer
 ):
@@ -37,8 +176,9 @@ class UserSerializer(
 
 
 class RoomSerializer(
+    DynamicFieldsSerializerMixin,
     ValidateWithCleanSerializerMixin,
-    serializers.HyperlinkedModelSerializer
+    CachedHyperlinkedModelSerializer
 ):
     class Meta:
         model = Room
@@ -50,9 +190,14 @@ class RoomSerializer(
 
 
 class ReservationSerializer(
-    ValidateWithCleanSerializerMixin,
-    serializers.HyperlinkedModelSerializer
+    DynamicFieldsSerializerMixin,
+    CachedHyperlinkedModelSerializer
 ):
+    expandable_fields = {
+        'event': lambda: EventSerializer(read_only=True),
+        'user': lambda: UserSerializer(read_only=True),
+    }
+
     class Meta:
         model = Reservation
         fields = (
@@ -61,16 +206,79 @@ class ReservationSerializer(
             'user'
         )
 
+    def create(self, validated_data):
+        # Capacity is checked by the admission service under the event lock,
+        # so there is no unlocked pre-check in validate().
+        try:
+            result = reserve(**validated_data, waitlist=True)
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+        if isinstance(result, WaitlistEntry):
+            raise Waitlisted(result)
+
+        return result
+
+    def update(self, instance, validated_data):
+        # An update can only move the reservation to another event, through
+        # the same locked admission as create().
+        if validated_data.get('user', instance.user) != instance.user:
+            raise serializers.ValidationError({
+                'user': _("The user of a reservation can not be changed."),
+            })
+
+        event: Event = validated_data.get('event', instance.event)
+        if event.pk == instance.event_id:
+            return instance
+
+        try:
+            return move_reservation(instance, event)
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+
+class WaitlistEntrySerializer(CachedHyperlinkedModelSerializer):
+    position = serializers.IntegerField(
+        source='get_position',
+        read_only=True
+    )
+
+    class Meta:
+        model = WaitlistEntry
+        fields = (
+            'id',
+            'event',
+            'user',
+            'position'
+        )
+
+
+class SeatHoldSerializer(CachedHyperlinkedModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = (
+            'id',
+            'event',
+            'user',
+            'expires_at'
+        )
+
 
 class EventSerializer(
+    DynamicFieldsSerializerMixin,
     ValidateWithCleanSerializerMixin,
-    serializers.HyperlinkedModelSerializer
+    CachedHyperlinkedModelSerializer
 ):
-    room = serializers.HyperlinkedRelatedField(
+    expandable_fields = {
+        'room': lambda: RoomSerializer(read_only=True),
+    }
+
+    room = CachedHyperlinkedRelatedField(
         many=False,
         view_name='room-detail',
         queryset=Room.objects.all()
     )
+    remaining_capacity = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Event
@@ -78,6 +286,182 @@ class EventSerializer(
             'id',
             'name',
             'room',
-            'date',
-            'is_public'
+            'starts_at',
+            'ends_at',
+            'is_public',
+            'remaining_capacity'
         )
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            self.raise_overlap(Event(**validated_data))
+            raise
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            self.raise_overlap(instance)
+            raise
+
+    def raise_overlap(self, event: Event) -> None:
+        # room_event_room_overlap_excl rejected the write; report it as the
+        # same validation error Event.clean() gives without the constraint.
+        if event.has_overlap():
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    _("Room is booked at that time.")
+                ],
+            })
+
+
+class ArchivedEventSerializer(CachedHyperlinkedModelSerializer):
+    class Meta:
+        model = ArchivedEvent
+        fields = (
+            'id',
+            'name',
+            'room',
+            'starts_at',
+            'ends_at',
+            'is_public',
+            'reserved_count',
+            'archived_at'
+        )
+
+
+class ArchivedReservationSerializer(CachedHyperlinkedModelSerializer):
+    class Meta:
+        model = ArchivedReservation
+        fields = (
+            'id',
+            'event',
+            'user',
+            'created_at'
+        )
+
+
+class BulkReservationItemSerializer(serializers.Serializer):
+    user = HyperlinkedIdField(
+        view_name='user-detail',
+        queryset=User.objects.none()
+    )
+    event = HyperlinkedIdField(
+        view_name='event-detail',
+        queryset=Event.objects.none()
+    )
+
+
+class EventSeriesSerializer(serializers.Serializer):
+    max_occurrences: int = 366
+
+    name = serializers.CharField(max_length=225)
+    room = serializers.HyperlinkedRelatedField(
+        view_name='room-detail',
+        queryset=Room.objects.all()
+    )
+    is_public = serializers.BooleanField(default=False)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    frequency = serializers.ChoiceField(choices=tuple(SERIES_FREQUENCIES))
+    interval = serializers.IntegerField(min_value=1, default=1)
+    skip_conflicts = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError(
+                _("End date is before start date.")
+            )
+
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError(
+                _("End time is before start time.")
+            )
+
+        series: Tuple[datetime.date, datetime.date, str, int] = (
+            data.pop('start_date'),
+            data.pop('end_date'),
+            data.pop('frequency'),
+            data.pop('interval')
+        )
+        if count_series(*series) > self.max_occurrences:
+            raise serializers.ValidationError(
+                _("Series has more than %(n)d occurrences.") % {
+                    'n': self.max_occurrences
+                }
+            )
+
+        dates: List[datetime.date] = expand_series(*series)
+
+        start_time: datetime.time = data.pop('start_time')
+        end_time: datetime.time = data.pop('end_time')
+        data['slots'] = [
+            (local_datetime(date, start_time), local_datetime(date, end_time))
+            for date in dates
+        ]
+
+        return super().validate(data)
+
+
+class RoomAvailabilitySerializer(serializers.Serializer):
+    max_days: int = 366 * 5
+
+    capacity = serializers.IntegerField(min_value=0, default=0)
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data['end'] <= data['start']:
+            raise serializers.ValidationError(
+                _("End is before start.")
+            )
+
+        if (data['end'] - data['start']).days >= self.max_days:
+            raise serializers.ValidationError(
+                _("Range is longer than %(n)d days.") % {'n': self.max_days}
+            )
+
+        return super().validate(data)
+
+
+class EventExportFilterSerializer(serializers.Serializer):
+    room = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def filter(self, queryset, prefix: str = ''):
+        # Whole days of starts_at, as ranges the starts_at index can serve.
+        values: Dict[str, object] = dict(self.validated_data)
+        if 'date_from' in values:
+            values['date_from'] = local_datetime(values['date_from'])
+        if 'date_to' in values:
+            values['date_to'] = local_datetime(
+                values['date_to'] + datetime.timedelta(days=1)
+            )
+
+        lookups: Dict[str, str] = {
+            'room': f'{prefix}room',
+            'date_from': f'{prefix}starts_at__gte',
+            'date_to': f'{prefix}starts_at__lt',
+        }
+        return queryset.filter(**{
+            lookups[name]: value
+            for name, value in values.items()
+            if name in lookups
+        })
+
+
+class ReservationExportFilterSerializer(EventExportFilterSerializer):
+    event = serializers.IntegerField(required=False)
+
+    def filter(self, queryset, prefix: str = 'event__'):
+        if 'event' in self.validated_data:
+            queryset = queryset.filter(event=self.validated_data['event'])
+
+        return super().filter(queryset, prefix)
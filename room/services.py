@@ -0,0 +1,592 @@
+import bisect
+import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from room.cache import invalidate_public_events
+from room.live import notify_on_commit
+from room.outbox import (
+    RESERVATION_CREATED,
+    RESERVATION_DELETED,
+    enqueue_many,
+    reservation_payload,
+)
+from room.models import (
+    MAX_EVENT_DURATION,
+    EventFull,
+    Room,
+    Event,
+    Reservation,
+    SeatHold,
+    WaitlistEntry,
+    ArchivedEvent,
+    ArchivedReservation,
+    held_count,
+    overlapping,
+)
+
+# (starts_at, ends_at)
+Slot = Tuple[datetime.datetime, datetime.datetime]
+
+ARCHIVED_EVENT_FIELDS: Tuple[str, ...] = (
+    'id',
+    'name',
+    'room_id',
+    'starts_at',
+    'ends_at',
+    'is_public',
+    'reserved_count',
+    'created_at',
+    'updated_at',
+)
+ARCHIVED_RESERVATION_FIELDS: Tuple[str, ...] = (
+    'id',
+    'user_id',
+    'event_id',
+    'created_at',
+    'updated_at',
+)
+
+SERIES_FREQUENCIES: Dict[str, datetime.timedelta] = {
+    'daily': datetime.timedelta(days=1),
+    'weekly': datetime.timedelta(weeks=1),
+}
+
+
+def reservation_count() -> Coalesce:
+    # Per-event COUNT(*) of reservations, for use in Event annotations and
+    # updates. Only needed to reconcile Event.reserved_count.
+    counts: Subquery = Subquery(
+        Reservation.objects.filter(
+            event=OuterRef('pk')
+        ).order_by().values('event').annotate(n=Count('pk')).values('n')
+    )
+    return Coalesce(counts, 0)
+
+
+def lock_event(event_id: int, holder: Optional[User] = None) -> Event:
+    # Row lock on the event only, so bookings for other events (even in the
+    # same room) are never serialized behind this one. Live holds are counted
+    # in the same query, so remaining_capacity accounts for them.
+    return (
+        Event.objects
+        .select_for_update(of=('self',))
+        .select_related('room')
+        .annotate(held_count=held_count(holder))
+        .get(pk=event_id)
+    )
+
+
+def reserve(
+    user: User,
+    event: Event,
+    waitlist: bool = False
+) -> Union[Reservation, WaitlistEntry]:
+    """
+    Book a seat, or with ``waitlist`` queue the user when the event is full
+    and return their WaitlistEntry instead.
+    """
+    with transaction.atomic():
+        reservation: Reservation = Reservation(
+            user=user,
+            event=lock_event(event.pk, holder=user),
+        )
+
+        try:
+            reservation.clean()
+        except EventFull:
+            if not waitlist:
+                raise
+
+            if Reservation.objects.filter(
+                user=user,
+                event_id=event.pk
+            ).exists():
+                raise reservation.unique_error_message(
+                    Reservation,
+                    ('user', 'event')
+                )
+
+            entry, _created = WaitlistEntry.objects.get_or_create(
+                user=user,
+                event_id=event.pk
+            )
+            return entry
+
+        try:
+            with transaction.atomic():
+                reservation.save()
+        except IntegrityError:
+            raise reservation.unique_error_message(
+                Reservation,
+                ('user', 'event')
+            )
+
+        # The held seat is now the reservation.
+        SeatHold.objects.filter(user=user, event_id=event.pk).delete()
+
+    return reservation
+
+
+def move_reservation(reservation: Reservation, event: Event) -> Reservation:
+    """
+    Move a reservation to another event, with the same admission checks as
+    reserve(). The seat freed on the old event goes to its waitlist.
+    """
+    with transaction.atomic():
+        old_event_id: int = reservation.event_id
+
+        # Locked in pk order so crossing moves cannot deadlock.
+        events: Dict[int, Event] = {
+            locked.pk: locked
+            for locked in Event.objects.select_for_update(
+                of=('self',)
+            ).select_related('room').annotate(
+                held_count=held_count(reservation.user)
+            ).filter(pk__in=(old_event_id, event.pk)).order_by('pk')
+        }
+        reservation.event = events[event.pk]
+
+        if Reservation.objects.filter(
+            user_id=reservation.user_id,
+            event_id=event.pk
+        ).exists():
+            raise reservation.unique_error_message(
+                Reservation,
+                ('user', 'event')
+            )
+        reservation.clean()
+
+        # Queryset updates: the counters move here, not in the signals.
+        now: datetime.datetime = timezone.now()
+        Reservation.objects.filter(pk=reservation.pk).update(
+            event_id=event.pk,
+            updated_at=now
+        )
+        Event.objects.filter(pk=old_event_id, reserved_count__gt=0).update(
+            reserved_count=F('reserved_count') - 1,
+            updated_at=now
+        )
+        Event.objects.filter(pk=event.pk).update(
+            reserved_count=F('reserved_count') + 1,
+            updated_at=now
+        )
+        SeatHold.objects.filter(
+            user_id=reservation.user_id,
+            event_id=event.pk
+        ).delete()
+        enqueue_many((
+            (
+                RESERVATION_DELETED,
+                {**reservation_payload(reservation), 'event': old_event_id}
+            ),
+            (RESERVATION_CREATED, reservation_payload(reservation)),
+        ))
+
+        promote_waitlist(old_event_id)
+        invalidate_public_events()
+        notify_on_commit((old_event_id, event.pk))
+
+    return reservation
+
+
+def get_hold_ttl() -> datetime.timedelta:
+    return datetime.timedelta(seconds=settings.SEAT_HOLD_TTL)
+
+
+def hold_seat(user: User, event: Event) -> SeatHold:
+    """
+    Hold a seat for the user until the TTL runs out, or renew their hold.
+    Raises EventFull when no seat is left to hold.
+    """
+    with transaction.atomic():
+        event = lock_event(event.pk, holder=user)
+        now: datetime.datetime = timezone.now()
+
+        # Reclaim the event's expired holds while it is locked anyway; only
+        # a range of the (event, expires_at) index is touched.
+        SeatHold.objects.filter(event=event, expires_at__lte=now).delete()
+
+        reservation: Reservation = Reservation(user=user, event=event)
+        if Reservation.objects.filter(user=user, event=event).exists():
+            raise reservation.unique_error_message(
+                Reservation,
+                ('user', 'event')
+            )
+        reservation.clean()
+
+        hold, _created = SeatHold.objects.update_or_create(
+            user=user,
+            event=event,
+            defaults={'expires_at': now + get_hold_ttl()}
+        )
+
+    return hold
+
+
+def release_hold(user: User, event: Event) -> bool:
+    """
+    Give up the user's hold, handing the seat to the waitlist. Returns
+    whether there was a hold.
+    """
+    with transaction.atomic():
+        deleted, _rows = SeatHold.objects.filter(
+            user=user,
+            event_id=event.pk
+        ).delete()
+        if deleted:
+            promote_waitlist(event.pk)
+
+    return bool(deleted)
+
+
+def promote_waitlist(event_id: int) -> List[Reservation]:
+    """
+    Turn waiting users into reservations while the event has free seats.
+    Runs inside the transaction that freed the seat.
+    """
+    promoted: List[Reservation] = []
+
+    with transaction.atomic():
+        event: Event = lock_event(event_id)
+
+        while event.remaining_capacity > 0:
+            # Head of the queue from the (event, id) index; a single locked
+            # row, never a scan of the waitlist.
+            entry: Optional[WaitlistEntry] = (
+                WaitlistEntry.objects
+                .select_for_update()
+                .filter(event_id=event_id)
+                .order_by('id')
+                .first()
+            )
+            if entry is None:
+                break
+
+            entry.delete()
+            if Reservation.objects.filter(
+                user_id=entry.user_id,
+                event_id=event_id
+            ).exists():
+                continue
+
+            promoted.append(Reservation.objects.create(
+                user_id=entry.user_id,
+                event=event
+            ))
+            event.reserved_count += 1
+
+    return promoted
+
+
+def increment_reserved_counts(counts: Dict[int, int]) -> None:
+    # One UPDATE for any number of events, for paths that bypass the
+    # Reservation post_save receiver (bulk_create).
+    if not counts:
+        return
+
+    Event.objects.filter(pk__in=counts).update(
+        reserved_count=F('reserved_count') + Case(
+            *[When(pk=pk, then=Value(n)) for pk, n in counts.items()],
+            default=Value(0)
+        ),
+        updated_at=timezone.now()
+    )
+    invalidate_public_events()
+    notify_on_commit(counts)
+
+
+def bulk_reserve(
+    pairs: List[Tuple[int, int]],
+    notify: bool = True
+) -> List[Union[Reservation, ValidationError]]:
+    """
+    Admit a batch of (user_id, event_id) pairs with a fixed number of
+    queries, returning a Reservation or a ValidationError per pair.
+    ``notify=False`` writes no outbox messages, for bookings that are
+    loaded rather than made.
+    """
+    results: List[Union[Reservation, ValidationError]] = []
+    user_ids: Set[int] = {user_id for user_id, _event_id in pairs}
+    event_ids: Set[int] = {event_id for _user_id, event_id in pairs}
+
+    with transaction.atomic():
+        # Locked in pk order so overlapping batches cannot deadlock.
+        events: Dict[int, Event] = {
+            event.pk: event
+            for event in Event.objects.select_for_update(
+                of=('self',)
+            ).select_related('room').annotate(
+                held_count=held_count()
+            ).filter(pk__in=event_ids).order_by('pk')
+        }
+        existing_users: Set[int] = set(
+            User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+        )
+        booked: Set[Tuple[int, int]] = set(
+            Reservation.objects.filter(
+                user_id__in=user_ids,
+                event_id__in=event_ids
+            ).values_list('user_id', 'event_id')
+        )
+        holds: Dict[Tuple[int, int], int] = {
+            (user_id, event_id): pk
+            for pk, user_id, event_id in SeatHold.objects.filter(
+                user_id__in=user_ids,
+                event_id__in=event_ids,
+                expires_at__gt=timezone.now()
+            ).values_list('pk', 'user_id', 'event_id')
+        }
+
+        pending: List[Reservation] = []
+        consumed: List[int] = []
+        for user_id, event_id in pairs:
+            if event_id not in events:
+                results.append(ValidationError(_("Event does not exist.")))
+                continue
+
+            if user_id not in existing_users:
+                results.append(ValidationError(_("User does not exist.")))
+                continue
+
+            reservation: Reservation = Reservation(
+                user_id=user_id,
+                event=events[event_id]
+            )
+
+            if (user_id, event_id) in booked:
+                results.append(reservation.unique_error_message(
+                    Reservation,
+                    ('user', 'event')
+                ))
+                continue
+
+            # The user's own hold is the seat they are booking.
+            hold_id: Optional[int] = holds.get((user_id, event_id))
+            if hold_id is not None:
+                events[event_id].held_count -= 1
+
+            try:
+                reservation.clean()
+            except ValidationError as e:
+                if hold_id is not None:
+                    events[event_id].held_count += 1
+                results.append(e)
+                continue
+
+            # Keep the in-memory counter current so clean() sees the seats
+            # taken earlier in this batch.
+            events[event_id].reserved_count += 1
+            if hold_id is not None:
+                consumed.append(hold_id)
+            booked.add((user_id, event_id))
+            pending.append(reservation)
+            results.append(reservation)
+
+        Reservation.objects.bulk_create(pending)
+        if notify:
+            enqueue_many(
+                (RESERVATION_CREATED, reservation_payload(reservation))
+                for reservation in pending
+            )
+        if consumed:
+            SeatHold.objects.filter(pk__in=consumed).delete()
+
+        counts: Dict[int, int] = {}
+        for reservation in pending:
+            counts[reservation.event_id] = counts.get(
+                reservation.event_id,
+                0
+            ) + 1
+        increment_reserved_counts(counts)
+
+    return results
+
+
+def local_datetime(
+    date: datetime.date,
+    time: datetime.time = datetime.time.min
+) -> datetime.datetime:
+    # Dates and times from clients are in the current time zone.
+    return timezone.make_aware(datetime.datetime.combine(date, time))
+
+
+def count_series(
+    start: datetime.date,
+    end: datetime.date,
+    frequency: str,
+    interval: int = 1
+) -> int:
+    # Arithmetic, so a series of any length is measured without building
+    # it or stepping past date.max.
+    step: int = SERIES_FREQUENCIES[frequency].days * interval
+    return (end - start).days // step + 1 if end >= start else 0
+
+
+def expand_series(
+    start: datetime.date,
+    end: datetime.date,
+    frequency: str,
+    interval: int = 1
+) -> List[datetime.date]:
+    step: int = SERIES_FREQUENCIES[frequency].days * interval
+    return [
+        start + datetime.timedelta(days=step * n)
+        for n in range(count_series(start, end, frequency, interval))
+    ]
+
+
+def booked_slots(
+    room_ids: Iterable[int],
+    slots: List[Slot]
+) -> Dict[int, List[Slot]]:
+    """
+    The slots already booked in each room around ``slots``, sorted, from one
+    range scan of the (room, starts_at) index.
+    """
+    booked: Dict[int, List[Slot]] = {room_id: [] for room_id in room_ids}
+    if not slots:
+        return booked
+
+    for room_id, starts_at, ends_at in Event.objects.filter(
+        overlapping(
+            min(starts_at for starts_at, _ends_at in slots),
+            max(ends_at for _starts_at, ends_at in slots)
+        ),
+        room_id__in=booked
+    ).order_by('starts_at').values_list('room_id', 'starts_at', 'ends_at'):
+        booked[room_id].append((starts_at, ends_at))
+
+    return booked
+
+
+def slot_overlaps(booked: List[Slot], slot: Slot) -> bool:
+    # ``booked`` is sorted, and nothing starting before starts_at -
+    # MAX_EVENT_DURATION can reach into the slot.
+    starts_at, ends_at = slot
+    index: int = bisect.bisect_left(
+        booked,
+        (starts_at - MAX_EVENT_DURATION, )
+    )
+    for other_starts_at, other_ends_at in booked[index:]:
+        if other_starts_at >= ends_at:
+            return False
+        if other_ends_at > starts_at:
+            return True
+
+    return False
+
+
+def create_event_series(
+    room: Room,
+    slots: List[Slot],
+    skip_conflicts: bool = False,
+    **fields
+) -> Tuple[List[Event], List[datetime.datetime]]:
+    """
+    Insert one event per slot in a single transaction. Returns the created
+    events and the starts of the slots that clashed with events in the room;
+    nothing is created on a clash unless skip_conflicts is set.
+    """
+    with transaction.atomic():
+        # Serializes series creation per room so two series cannot both
+        # pass the conflict check for the same slot.
+        room = Room.objects.select_for_update().get(pk=room.pk)
+
+        booked: List[Slot] = booked_slots((room.pk, ), slots)[room.pk]
+        free: List[Slot] = []
+        conflicts: List[datetime.datetime] = []
+        for slot in slots:
+            if slot_overlaps(booked, slot):
+                conflicts.append(slot[0])
+            else:
+                free.append(slot)
+
+        if conflicts and not skip_conflicts:
+            return [], conflicts
+
+        try:
+            with transaction.atomic():
+                events: List[Event] = Event.objects.bulk_create([
+                    Event(
+                        room=room,
+                        starts_at=starts_at,
+                        ends_at=ends_at,
+                        **fields
+                    )
+                    for starts_at, ends_at in free
+                ])
+        except IntegrityError:
+            # A single-event create slipped in after the conflict check;
+            # room_event_room_overlap_excl rejected the whole batch.
+            booked = booked_slots((room.pk, ), slots)[room.pk]
+            return [], [
+                slot[0] for slot in slots if slot_overlaps(booked, slot)
+            ]
+        invalidate_public_events()
+
+    return events, conflicts
+
+
+def delete_archived(event_ids: List[int]) -> None:
+    # Plain DELETEs, as QuerySet.delete() would send the reservation
+    # signals. Children first, the foreign keys are not ON DELETE CASCADE.
+    quote = connection.ops.quote_name
+    placeholders: str = ', '.join(['%s'] * len(event_ids))
+    with connection.cursor() as cursor:
+        for model in (Reservation, WaitlistEntry, SeatHold, Event):
+            column: str = (
+                model._meta.pk if model is Event
+                else model._meta.get_field('event')
+            ).column
+            cursor.execute(
+                f'DELETE FROM {quote(model._meta.db_table)} '
+                f'WHERE {quote(column)} IN ({placeholders})',
+                event_ids
+            )
+
+
+def archive_events(event_ids: List[int]) -> Tuple[int, int]:
+    """
+    Move events and their reservations into the archive tables in one
+    transaction, returning how many of each were moved. The live rows are
+    deleted without signals: archiving cancels nothing, so no counters,
+    waitlist promotions or outbox messages must follow.
+    """
+    with transaction.atomic():
+        events: List[dict] = list(
+            Event.objects.select_for_update(of=('self',)).filter(
+                pk__in=event_ids
+            ).order_by('pk').values(*ARCHIVED_EVENT_FIELDS)
+        )
+        archived_ids: List[int] = [event['id'] for event in events]
+        reservations: List[dict] = list(
+            Reservation.objects.filter(
+                event_id__in=archived_ids
+            ).values(*ARCHIVED_RESERVATION_FIELDS)
+        )
+
+        ArchivedEvent.objects.bulk_create(
+            ArchivedEvent(**event) for event in events
+        )
+        ArchivedReservation.objects.bulk_create(
+            (
+                ArchivedReservation(**reservation)
+                for reservation in reservations
+            ),
+            batch_size=1000
+        )
+
+        if events:
+            delete_archived(archived_ids)
+            invalidate_public_events()
+
+    return len(events), len(reservations)
@@ -0,0 +1,150 @@
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from room.cache import invalidate_public_events
+from room.live import broadcaster
+from room.outbox import (
+    EVENT_RESCHEDULED,
+    RESERVATION_CREATED,
+    RESERVATION_DELETED,
+    enqueue,
+    reservation_payload,
+)
+from room.services import promote_waitlist
+from room.models import (
+    Room,
+    Event,
+    Reservation,
+    SeatHold,
+)
+
+
+@receiver(post_save, sender=Reservation)
+def increment_reserved_count(
+    sender,
+    instance: Reservation,
+    created: bool,
+    **kwargs
+) -> None:
+    if not created:
+        return
+
+    Event.objects.filter(pk=instance.event_id).update(
+        reserved_count=F('reserved_count') + 1,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_delete, sender=Reservation)
+def decrement_reserved_count(
+    sender,
+    instance: Reservation,
+    **kwargs
+) -> None:
+    # Also runs for every reservation removed by the event's CASCADE; the
+    # update then targets a row that is about to be deleted and is harmless.
+    Event.objects.filter(
+        pk=instance.event_id,
+        reserved_count__gt=0
+    ).update(
+        reserved_count=F('reserved_count') - 1,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_delete, sender=Reservation)
+def promote_from_waitlist(
+    sender,
+    instance: Reservation,
+    origin=None,
+    **kwargs
+) -> None:
+    # Only a cancelled reservation frees a seat; when the event itself is
+    # being deleted (CASCADE) there is nothing to promote into.
+    deleted_from = (
+        origin.model if isinstance(origin, QuerySet) else type(origin)
+    )
+    if deleted_from is not Reservation:
+        return
+
+    promote_waitlist(instance.event_id)
+
+
+@receiver(post_save, sender=Reservation)
+def enqueue_reservation_created(
+    sender,
+    instance: Reservation,
+    created: bool,
+    **kwargs
+) -> None:
+    if created:
+        enqueue(RESERVATION_CREATED, reservation_payload(instance))
+
+
+@receiver(post_delete, sender=Reservation)
+def enqueue_reservation_deleted(
+    sender,
+    instance: Reservation,
+    **kwargs
+) -> None:
+    enqueue(RESERVATION_DELETED, reservation_payload(instance))
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_slot(sender, instance: Event, **kwargs) -> None:
+    # The stored room and slot, for enqueue_event_rescheduled to compare.
+    instance._saved_slot = None
+    if instance.pk is not None:
+        instance._saved_slot = Event.objects.filter(
+            pk=instance.pk
+        ).values_list('room_id', 'starts_at', 'ends_at').first()
+
+
+@receiver(post_save, sender=Event)
+def enqueue_event_rescheduled(
+    sender,
+    instance: Event,
+    created: bool,
+    **kwargs
+) -> None:
+    saved: Optional[tuple] = getattr(instance, '_saved_slot', None)
+    slot: tuple = (instance.room_id, instance.starts_at, instance.ends_at)
+    if created or saved is None or saved == slot:
+        return
+
+    enqueue(EVENT_RESCHEDULED, {
+        'event': instance.pk,
+        'room': instance.room_id,
+        'starts_at': instance.starts_at,
+        'ends_at': instance.ends_at,
+        'previous': dict(zip(('room', 'starts_at', 'ends_at'), saved)),
+    })
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_save, sender=SeatHold)
+@receiver(post_delete, sender=SeatHold)
+def notify_capacity_stream(sender, **kwargs) -> None:
+    # Live clients of this process get the new number right after commit,
+    # instead of on the next poll.
+    transaction.on_commit(broadcaster.notify)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_save, sender=SeatHold)
+@receiver(post_delete, sender=SeatHold)
+def invalidate_public_event_cache(sender, **kwargs) -> None:
+    # Reservations and holds change Event.remaining_capacity, so they count
+    # too.
+    invalidate_public_events()
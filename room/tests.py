@@ -1,19 +1,98 @@
+import asyncio
+import base64
+import csv
 import datetime
-from typing import Optional
-from rest_framework.test import APITestCase
+import io
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+from unittest import skipUnless
+from asgiref.sync import sync_to_async
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 
-from django.db.models import QuerySet
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Count, F, ProtectedError, QuerySet
 from django.contrib.auth.models import User
+from django.test import (
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from room_manager.asgi import application
+from room_manager.authentication import user_cache
+from room_manager.routers import (
+    ReadReplicaRouter,
+    get_pin_cache,
+    is_pinned,
+    pin_key,
+    pin_to_primary,
+    release_replica,
+    use_replica,
+)
+from room_manager.testing import QueryCountAssertionsMixin
 
 from room.models import (
     Room,
     Event,
-    Reservation
+    Reservation,
+    SeatHold,
+    WaitlistEntry,
+    IdempotencyKey,
+    OutboxMessage,
+    ArchivedEvent,
+    ArchivedReservation,
+)
+from room.live import STREAM_PATH, broadcaster, remaining_capacities
+from room.outbox import (
+    EVENT_RESCHEDULED,
+    RESERVATION_CREATED,
+    RESERVATION_DELETED,
+)
+from room.services import (
+    bulk_reserve,
+    hold_seat,
+    move_reservation,
+    reserve,
 )
 
 
+# Outbox handlers for OutboxTest.
+delivered_messages: List[OutboxMessage] = []
+
+
+def record_message(message: OutboxMessage) -> None:
+    delivered_messages.append(message)
+
+
+def fail_message(message: OutboxMessage) -> None:
+    raise RuntimeError("calendar is down")
+
+
+def at(date: datetime.date, hour: int = 9) -> datetime.datetime:
+    return datetime.datetime.combine(
+        date,
+        datetime.time(hour),
+        tzinfo=datetime.timezone.utc
+    )
+
+
+# Replicas mirror the test database but can not see the uncommitted data of
+# a TestCase, reads stay on the primary unless a test routes them itself.
+@override_settings(READ_REPLICAS={**settings.READ_REPLICAS, 'ALIASES': []})
 class BaseAPITestCase(APITestCase):
     staff_user: User
     user: User
@@ -40,6 +119,8 @@ class BaseAPITestCase(APITestCase):
         self.user.set_password(self.password)
         self.user.save()
 
+        cache.clear()
+
         return super().setUp()
 
     def login(self, user: User) -> None:
@@ -49,27 +130,36 @@ class BaseAPITestCase(APITestCase):
         self.client.logout()
 
 
-class RoomBaseAPITestCase(BaseAPITestCase):
-    def _create_room(self, name: str = "steve's room") -> Room:
+class RoomBaseAPITestCase(QueryCountAssertionsMixin, BaseAPITestCase):
+    def _create_room(
+        self,
+        name: str = "steve's room",
+        capacity: int = 14
+    ) -> Room:
         return Room.objects.create(
             name=name,
-            capacity=14
+            capacity=capacity
         )
 
     def _create_event(
         self,
         room: Optional[Room] = None,
         name: str = "steve's event",
-        date: datetime.date = datetime.date.today(),
+        starts_at: Optional[datetime.datetime] = None,
+        hours: int = 2,
         is_public: bool = False
     ) -> Event:
         if not room:
             room = self._create_room()
 
+        if starts_at is None:
+            starts_at = at(datetime.date.today())
+
         return Event.objects.create(
             room=room,
             name=name,
-            date=date,
+            starts_at=starts_at,
+            ends_at=starts_at + datetime.timedelta(hours=hours),
             is_public=is_public
         )
 
@@ -213,17 +303,113 @@ class RoomAPITest(RoomBaseAPITestCase):
         )
 
         self.assertEqual(
-            len(response.json()),
+            len(response.json()['results']),
             1
         )
 
+    def test_available_rooms(self) -> None:
+        start: datetime.datetime = at(datetime.date(2030, 1, 1), 9)
+        booked: Room = self._create_room(name='booked', capacity=20)
+        small: Room = self._create_room(name='small', capacity=5)
+        free: Room = self._create_room(name='free', capacity=20)
+        later: Room = self._create_room(name='later', capacity=30)
+
+        # Overlaps the tail of the range, the other starts as it ends.
+        self._create_event(room=booked, starts_at=at(start.date(), 10))
+        self._create_event(room=later, starts_at=at(start.date(), 11))
+
+        response = self.client.get(
+            reverse('room-available'),
+            {
+                'capacity': 10,
+                'start': start.isoformat(),
+                'end': (start + datetime.timedelta(hours=2)).isoformat(),
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK,
+            msg=response.content
+        )
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [free.pk, later.pk]
+        )
+
+        response = self.client.get(
+            reverse('room-available'),
+            {
+                'start': start.isoformat(),
+                'end': (start - datetime.timedelta(hours=1)).isoformat(),
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_list_constant_queries(self) -> None:
+        def request(name: str) -> Callable[[], None]:
+            def get() -> None:
+                response = self.client.get(reverse(name), format='json')
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_200_OK,
+                    msg=response.content
+                )
+            return get
+
+        usernames: Iterator[str] = (f'grow-{i}' for i in itertools.count())
+
+        def grow(n_rows: int) -> None:
+            for _i in range(n_rows):
+                self._create_reservation(
+                    user=User.objects.create(username=next(usernames)),
+                    event=self._create_event(is_public=True)
+                )
+
+        self.assertQueryCountConstant(request('room-list'), grow)
+        self.assertQueryCountConstant(request('event-list'), grow)
+
+        self.login(self.staff_user)
+        self.assertQueryCountConstant(request('event-list'), grow)
+        self.assertQueryCountConstant(request('reservation-list'), grow)
+
+    @override_settings(DEBUG=True)
+    def test_sql_instrumentation_headers(self) -> None:
+        self._create_room()
+
+        response = self.client.get(reverse('room-list'), format='json')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK
+        )
+        self.assertGreaterEqual(int(response['X-SQL-Query-Count']), 1)
+        self.assertIn('X-SQL-Time-Ms', response)
+        self.assertEqual(response['X-SQL-Duplicate-Queries'], '0')
+
+    def test_sql_instrumentation_log(self) -> None:
+        with self.assertLogs('room_manager.sql', level='INFO') as logs:
+            self.client.get(reverse('room-list'), format='json')
+
+        self.assertIn('room-list queries=', logs.output[0])
+
+        with self.settings(SQL_LOG_WARNING_QUERIES=1):
+            with self.assertLogs('room_manager.sql', level='WARNING') as logs:
+                self.client.get(reverse('room-list'), format='json')
+
+        self.assertIn('WARNING:room_manager.sql:GET room-list', logs.output[0])
+
 
 class EventAPITest(RoomBaseAPITestCase):
     name: str = "steve's event"
 
     def test_create_event(self) -> None:
         room: Room = self._create_room(name=self.name)
-        date_str: str = datetime.date.today().isoformat()
+        starts_at: datetime.datetime = at(datetime.date.today())
+        hour: datetime.timedelta = datetime.timedelta(hours=1)
 
         # Test with non-auth.
 
@@ -249,7 +435,8 @@ class EventAPITest(RoomBaseAPITestCase):
             {
                 "name": self.name,
                 "room": reverse('room-detail', kwargs={'pk': room.pk}),
-                "date": date_str
+                "starts_at": starts_at.isoformat(),
+                "ends_at": (starts_at + hour).isoformat()
             },
             format='json'
         )
@@ -259,17 +446,37 @@ class EventAPITest(RoomBaseAPITestCase):
             msg=response.content
         )
 
-        qs: QuerySet = Event.objects.filter(name=self.name, date=date_str)
+        qs: QuerySet = Event.objects.filter(
+            name=self.name,
+            starts_at=starts_at
+        )
 
         self.assertTrue(qs.count(), 1)
 
+        # Test with an event ending before it starts.
+
+        response = self.client.post(
+            reverse('event-list'),
+            {
+                "name": self.name,
+                "room": reverse('room-detail', kwargs={'pk': room.pk}),
+                "starts_at": starts_at.isoformat(),
+                "ends_at": (starts_at - hour).isoformat()
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+            msg=response.content
+        )
+
     def test_list_events(self) -> None:
         # Test with staff user.
 
         self.login(self.staff_user)
         self._create_event()
 
-
         response = self.client.get(
             reverse('event-list'),
             format='json'
@@ -280,18 +487,18 @@ class EventAPITest(RoomBaseAPITestCase):
         )
 
         self.assertEqual(
-            len(response.json()),
+            len(response.json()['results']),
             1
         )
 
     def test_list_public_events(self) -> None:
         private_event: Event = self._create_event(
             is_public=False,
-            date=datetime.date.today()
+            starts_at=at(datetime.date.today())
         )
         public_event: Event = self._create_event(
             is_public=True,
-            date=datetime.date.today()
+            starts_at=at(datetime.date.today())
         )
 
         # Test with non-auth.
@@ -305,7 +512,7 @@ class EventAPITest(RoomBaseAPITestCase):
             status.HTTP_200_OK
         )
 
-        data: dict = response.json()
+        data: List[dict] = response.json()['results']
         self.assertEqual(
             len(data),
             1
@@ -326,7 +533,7 @@ class EventAPITest(RoomBaseAPITestCase):
             status.HTTP_200_OK
         )
 
-        data: dict = response.json()
+        data: List[dict] = response.json()['results']
         self.assertEqual(
             len(data),
             2
@@ -335,6 +542,460 @@ class EventAPITest(RoomBaseAPITestCase):
         self.assertEqual(data[0]['id'], private_event.pk)
         self.assertEqual(data[1]['id'], public_event.pk)
 
+    def test_create_event_series(self) -> None:
+        room: Room = self._create_room()
+        start: datetime.date = datetime.date(2030, 1, 7)
+        taken: Event = self._create_event(
+            room=room,
+            starts_at=at(start + datetime.timedelta(weeks=2), 10)
+        )
+        # The same room later on the series' days is free.
+        self._create_event(room=room, starts_at=at(start, 11))
+        payload: dict = {
+            "name": self.name,
+            "room": reverse('room-detail', kwargs={'pk': room.pk}),
+            "start_date": start.isoformat(),
+            "end_date": (start + datetime.timedelta(weeks=4)).isoformat(),
+            "start_time": "09:00",
+            "end_time": "10:30",
+            "frequency": "weekly",
+        }
+
+        self.login(self.staff_user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse('event-series'),
+                payload,
+                format='json'
+            )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+            msg=response.content
+        )
+        self.assertEqual(
+            response.json()['conflicts'],
+            [at(taken.starts_at.date(), 9).isoformat().replace('+00:00', 'Z')]
+        )
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertEqual(
+            len([
+                q for q in ctx.captured_queries
+                if 'room_event' in q['sql']
+            ]),
+            1
+        )
+
+        response = self.client.post(
+            reverse('event-series'),
+            {**payload, "skip_conflicts": True},
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            msg=response.content
+        )
+        self.assertEqual(len(response.json()['events']), 4)
+        self.assertEqual(Event.objects.filter(room=room).count(), 6)
+
+        # Too long a series is rejected before it is built, up to date.max.
+        for frequency, start_date in (
+            ('weekly', datetime.date(9000, 1, 1)),
+            ('daily', datetime.date.min),
+        ):
+            response = self.client.post(
+                reverse('event-series'),
+                {
+                    **payload,
+                    "frequency": frequency,
+                    "start_date": start_date.isoformat(),
+                    "end_date": datetime.date.max.isoformat(),
+                },
+                format='json'
+            )
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_400_BAD_REQUEST,
+                msg=response.content
+            )
+
+        response = self.client.post(
+            reverse('event-series'),
+            {
+                **payload,
+                "start_date": (
+                    start + datetime.timedelta(weeks=8)
+                ).isoformat(),
+                "end_date": datetime.date.max.isoformat(),
+                "interval": 10 ** 9,
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            msg=response.content
+        )
+        self.assertEqual(len(response.json()['events']), 1)
+
+    def test_list_events_pagination(self) -> None:
+        room: Room = self._create_room()
+        today: datetime.date = datetime.date.today()
+        events: List[Event] = [
+            self._create_event(
+                room=room,
+                starts_at=at(today + datetime.timedelta(days=offset)),
+                is_public=True
+            )
+            for offset in (3, 0, 4, 1, 2)
+        ]
+        expected: List[int] = [
+            event.pk for event in sorted(events, key=lambda e: e.starts_at)
+        ]
+
+        seen: List[int] = []
+        url: Optional[str] = reverse('event-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url, format='json')
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_200_OK,
+                msg=response.content
+            )
+            self.assertLessEqual(len(response.json()['results']), 2)
+            seen += [item['id'] for item in response.json()['results']]
+            last: dict = response.json()
+            url = last['next']
+
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(last['previous'], format='json')
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            expected[2:4]
+        )
+
+        response = self.client.get(
+            reverse('event-list'),
+            {'page_size': 10_000},
+            format='json'
+        )
+        self.assertEqual(len(response.json()['results']), 5)
+        self.assertIsNone(response.json()['next'])
+
+        response = self.client.get(
+            reverse('event-list'),
+            {'cursor': 'not-a-cursor'},
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+        # Cursors that decode but hold values of the wrong type.
+        for name, values in (
+            ('event-list', ['abc', 1]),
+            ('event-list', [None, None]),
+            ('event-list', [{'x': 1}, 1]),
+            ('event-list', ['2030-01-01T09:00:00+00:00', 'x']),
+            ('room-list', ['abc']),
+            ('room-list', [None]),
+            ('room-list', [[1]]),
+        ):
+            response = self.client.get(
+                reverse(name),
+                {'cursor': base64.urlsafe_b64encode(
+                    json.dumps({'k': values}).encode()
+                ).decode()},
+                format='json'
+            )
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_404_NOT_FOUND,
+                msg=(name, values)
+            )
+
+    def test_public_event_cache(self) -> None:
+        room: Room = self._create_room()
+        event: Event = self._create_event(room=room, is_public=True)
+
+        response = self.client.get(reverse('event-list'), format='json')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK
+        )
+        etag: str = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                reverse('event-list'),
+                format='json',
+                HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertFalse([
+            q for q in ctx.captured_queries if 'room_' in q['sql']
+        ])
+
+        room.capacity = 1
+        room.save()
+
+        response = self.client.get(
+            reverse('event-list'),
+            format='json',
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK
+        )
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            response.json()['results'][0]['remaining_capacity'],
+            1
+        )
+
+        self._create_reservation(user=self.user, event=event)
+
+        response = self.client.get(
+            reverse('event-detail', kwargs={'pk': event.pk}),
+            format='json'
+        )
+        self.assertEqual(response.json()['remaining_capacity'], 0)
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.client.get(
+            reverse('event-detail', kwargs={'pk': event.pk}),
+            format='json',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        # Unpublished and deleted events leave a cached list at once, even
+        # for clients that only send If-Modified-Since.
+        unpublished: Event = self._create_event(
+            room=room,
+            starts_at=event.ends_at,
+            is_public=True
+        )
+        deleted: Event = self._create_event(
+            room=room,
+            starts_at=unpublished.ends_at,
+            is_public=True
+        )
+        self.client.get(reverse('event-list'), format='json')
+
+        unpublished.is_public = False
+        unpublished.save()
+        deleted.delete()
+
+        response = self.client.get(
+            reverse('event-list'),
+            format='json',
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [event.pk]
+        )
+
+        self.login(self.staff_user)
+
+        response = self.client.get(reverse('event-list'), format='json')
+        self.assertNotIn('ETag', response)
+
+    def test_event_hyperlinks(self) -> None:
+        rooms: List[Room] = [self._create_room(), self._create_room()]
+        for room in rooms:
+            self._create_event(room=room, is_public=True)
+
+        response = self.client.get(reverse('event-list'), format='json')
+        self.assertEqual(
+            [item['room'] for item in response.json()['results']],
+            [
+                'http://testserver' + reverse(
+                    'room-detail',
+                    kwargs={'pk': room.pk}
+                )
+                for room in rooms
+            ]
+        )
+
+        # Cached per scheme and host, the links are absolute.
+        with self.settings(ALLOWED_HOSTS=['testserver', 'b.example']):
+            response = self.client.get(
+                reverse('event-list'),
+                format='json',
+                HTTP_HOST='b.example',
+                secure=True
+            )
+        self.assertTrue(all(
+            item['room'].startswith('https://b.example/')
+            for item in response.json()['results']
+        ))
+
+    def test_list_events_sparse_fields(self) -> None:
+        event: Event = self._create_event(is_public=True)
+
+        response = self.client.get(
+            reverse('event-list'),
+            {'fields': 'id,name,starts_at'},
+            format='json'
+        )
+        self.assertEqual(
+            response.json()['results'],
+            [{
+                'id': event.pk,
+                'name': event.name,
+                'starts_at': event.starts_at.isoformat().replace('+00:00', 'Z')
+            }]
+        )
+
+        response = self.client.get(
+            reverse('event-detail', kwargs={'pk': event.pk}),
+            {'fields': 'id,room', 'expand': 'room'},
+            format='json'
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                'id': event.pk,
+                'room': {
+                    'id': event.room.pk,
+                    'name': event.room.name,
+                    'capacity': event.room.capacity
+                }
+            }
+        )
+
+    def test_create_event_overlap(self) -> None:
+        event: Event = self._create_event()
+        payload: dict = {
+            "name": self.name,
+            "room": reverse('room-detail', kwargs={'pk': event.room.pk}),
+            "starts_at": (
+                event.starts_at + datetime.timedelta(hours=1)
+            ).isoformat(),
+            "ends_at": (
+                event.ends_at + datetime.timedelta(hours=1)
+            ).isoformat()
+        }
+
+        self.login(self.staff_user)
+
+        response = self.client.post(
+            reverse('event-list'),
+            payload,
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+            msg=response.content
+        )
+        self.assertEqual(
+            response.json(),
+            {'non_field_errors': ["Room is booked at that time."]}
+        )
+
+        # Back to back is not an overlap.
+
+        response = self.client.post(
+            reverse('event-list'),
+            {
+                **payload,
+                "starts_at": event.ends_at.isoformat(),
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            msg=response.content
+        )
+
+        response = self.client.patch(
+            reverse('event-detail', kwargs={'pk': event.pk}),
+            {"name": "renamed"},
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK,
+            msg=response.content
+        )
+
+        response = self.client.patch(
+            reverse('event-detail', kwargs={'pk': event.pk}),
+            {"ends_at": payload['ends_at']},
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+            msg=response.content
+        )
+
+        with self.assertRaises(IntegrityError):
+            Event.objects.create(
+                room=event.room,
+                name=self.name,
+                starts_at=event.ends_at,
+                ends_at=event.starts_at
+            )
+
+    @skipUnless(
+        connection.vendor == 'postgresql',
+        "room_event_room_overlap_excl only exists on PostgreSQL."
+    )
+    def test_overlap_exclusion_constraint(self) -> None:
+        event: Event = self._create_event()
+
+        with self.assertRaises(IntegrityError):
+            Event.objects.create(
+                room=event.room,
+                name=self.name,
+                starts_at=event.starts_at + datetime.timedelta(minutes=30),
+                ends_at=event.ends_at + datetime.timedelta(minutes=30)
+            )
+
+        # The constraint alone guards writes, clean() adds no query.
+        with self.assertNumQueries(0):
+            Event(
+                room=event.room,
+                name=self.name,
+                starts_at=event.starts_at,
+                ends_at=event.ends_at
+            ).clean()
+
+        self.login(self.staff_user)
+        response = self.client.post(
+            reverse('event-list'),
+            {
+                "name": self.name,
+                "room": reverse('room-detail', kwargs={'pk': event.room.pk}),
+                "starts_at": event.starts_at.isoformat(),
+                "ends_at": event.ends_at.isoformat(),
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(),
+            {'non_field_errors': ["Room is booked at that time."]}
+        )
+
 
 class ReservationAPITest(RoomBaseAPITestCase):
     def test_reservation_list(self) -> None:
@@ -368,7 +1029,7 @@ class ReservationAPITest(RoomBaseAPITestCase):
             msg=response.content
         )
 
-        data: dict = response.json()
+        data: List[dict] = response.json()['results']
         self.assertEqual(
             len(data),
             2
@@ -391,7 +1052,7 @@ class ReservationAPITest(RoomBaseAPITestCase):
             msg=response.content
         )
 
-        data: dict = response.json()
+        data: List[dict] = response.json()['results']
         self.assertEqual(
             len(data),
             1
@@ -555,3 +1216,1475 @@ class ReservationAPITest(RoomBaseAPITestCase):
         self.assertFalse(
             Reservation.objects.filter(pk=staff_reservation.pk).exists()
         )
+
+    def test_book_full_event(self) -> None:
+        event: Event = self._create_event(room=self._create_room(capacity=1))
+        self._create_reservation(user=self.staff_user, event=event)
+
+        self.login(self.user)
+
+        response = self.client.post(
+            reverse('reservation-list'),
+            {
+                "user": reverse('user-detail', kwargs={'pk': self.user.pk}),
+                "event": reverse('event-detail', kwargs={'pk': event.pk}),
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_202_ACCEPTED,
+            msg=response.content
+        )
+        self.assertEqual(response.json()['position'], 1)
+        self.assertEqual(event.reservations.count(), 1)
+        self.assertTrue(event.waitlist.filter(user=self.user).exists())
+
+    def test_waitlist_promotion(self) -> None:
+        event: Event = self._create_event(room=self._create_room(capacity=1))
+        reservation: Reservation = self._create_reservation(
+            user=self.staff_user,
+            event=event
+        )
+        waiting: List[User] = [
+            User.objects.create(username=f'waiting-{i}') for i in range(3)
+        ]
+
+        for position, user in enumerate(waiting, start=1):
+            entry = reserve(user, event, waitlist=True)
+            self.assertIsInstance(entry, WaitlistEntry)
+            self.assertEqual(entry.get_position(), position)
+
+        with self.assertRaises(ValidationError):
+            reserve(waiting[0], event)
+
+        self.login(self.staff_user)
+        response = self.client.delete(
+            reverse('reservation-detail', kwargs={'pk': reservation.pk}),
+            format='json',
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_204_NO_CONTENT,
+        )
+
+        event.refresh_from_db()
+        self.assertEqual(event.reserved_count, 1)
+        self.assertEqual(event.reservations.get().user, waiting[0])
+        self.assertEqual(
+            list(event.waitlist.order_by('id').values_list('user', flat=True)),
+            [user.pk for user in waiting[1:]]
+        )
+        self.assertEqual(event.waitlist.order_by('id')[0].get_position(), 1)
+
+        event.delete()
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_move_reservation(self) -> None:
+        room: Room = self._create_room(capacity=1)
+        event: Event = self._create_event(room=room)
+        full: Event = self._create_event(room=room, starts_at=event.ends_at)
+        free: Event = self._create_event(room=room, starts_at=full.ends_at)
+        reservation: Reservation = self._create_reservation(
+            user=self.user,
+            event=event
+        )
+        self._create_reservation(user=self.staff_user, event=full)
+        waiting: User = User.objects.create(username='waiting')
+        reserve(waiting, event, waitlist=True)
+        url: str = reverse('reservation-detail', kwargs={'pk': reservation.pk})
+
+        self.login(self.user)
+        response = self.client.patch(
+            url,
+            {"event": reverse('event-detail', kwargs={'pk': full.pk})},
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+            msg=response.content
+        )
+        self.assertEqual(response.json(), ["Room has no more capacity."])
+
+        response = self.client.patch(
+            url,
+            {"user": reverse('user-detail', kwargs={'pk': waiting.pk})},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(
+            url,
+            {"event": reverse('event-detail', kwargs={'pk': free.pk})},
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK,
+            msg=response.content
+        )
+
+        self.assertEqual(
+            {
+                pk: (reserved_count, actual)
+                for pk, reserved_count, actual in Event.objects.annotate(
+                    actual=Count('reservations')
+                ).values_list('pk', 'reserved_count', 'actual')
+            },
+            {event.pk: (1, 1), full.pk: (1, 1), free.pk: (1, 1)}
+        )
+        self.assertEqual(event.reservations.get().user, waiting)
+        self.assertEqual(free.reservations.get().user, self.user)
+
+    def test_seat_hold(self) -> None:
+        event: Event = self._create_event(
+            room=self._create_room(capacity=1),
+            is_public=True
+        )
+        url: str = reverse('event-hold', kwargs={'pk': event.pk})
+
+        self.login(self.user)
+        response = self.client.post(url, format='json')
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            msg=response.content
+        )
+        hold: SeatHold = SeatHold.objects.get(user=self.user, event=event)
+        self.assertGreater(hold.expires_at, timezone.now())
+
+        # Renewing is not blocked by the user's own hold.
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+        # The API and the live stream agree on what is left.
+        self.assertEqual(remaining_capacities([event.pk]), {event.pk: 0})
+        for response in (
+            self.client.get(reverse('event-list'), format='json'),
+            self.client.get(
+                reverse('event-detail', kwargs={'pk': event.pk}),
+                format='json'
+            ),
+            self.client.get(reverse('async-event-list')),
+        ):
+            body: dict = response.json()
+            item: dict = body['results'][0] if 'results' in body else body
+            self.assertEqual(item['remaining_capacity'], 0)
+
+        # The held seat is taken for everyone else.
+        with self.assertRaises(ValidationError):
+            hold_seat(self.staff_user, event)
+        entry = reserve(self.staff_user, event, waitlist=True)
+        self.assertIsInstance(entry, WaitlistEntry)
+
+        reservation = reserve(self.user, event)
+        self.assertIsInstance(reservation, Reservation)
+        self.assertFalse(SeatHold.objects.exists())
+
+        reservation.delete()
+        self.assertEqual(event.reservations.get().user, self.staff_user)
+
+        # Releasing a hold hands the seat to the waitlist.
+        event.reservations.all().delete()
+        hold_seat(self.user, event)
+        reserve(self.staff_user, event, waitlist=True)
+        response = self.client.delete(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(event.reservations.get().user, self.staff_user)
+
+    def test_seat_hold_expiry(self) -> None:
+        event: Event = self._create_event(room=self._create_room(capacity=1))
+        hold: SeatHold = hold_seat(self.user, event)
+        reserve(self.staff_user, event, waitlist=True)
+
+        # An expired hold frees its seat, the next hold on the event deletes
+        # the row.
+        SeatHold.objects.filter(pk=hold.pk).update(
+            expires_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        self.assertIsInstance(hold_seat(self.staff_user, event), SeatHold)
+        self.assertFalse(SeatHold.objects.filter(pk=hold.pk).exists())
+
+        SeatHold.objects.update(
+            expires_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        call_command('purge_expired', stdout=io.StringIO())
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(event.reservations.get().user, self.staff_user)
+        self.assertFalse(event.waitlist.exists())
+
+    def test_idempotent_create(self) -> None:
+        event: Event = self._create_event(room=self._create_room(capacity=1))
+        other: Event = self._create_event(
+            room=event.room,
+            starts_at=event.ends_at
+        )
+        data: dict = {
+            "user": reverse('user-detail', kwargs={'pk': self.user.pk}),
+            "event": reverse('event-detail', kwargs={'pk': event.pk}),
+        }
+
+        self.login(self.user)
+        response = self.client.post(
+            reverse('reservation-list'),
+            data,
+            format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-1'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            msg=response.content
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            replayed = self.client.post(
+                reverse('reservation-list'),
+                data,
+                format='json',
+                HTTP_IDEMPOTENCY_KEY='retry-1'
+            )
+        self.assertEqual(replayed.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed.json(), response.json())
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertFalse([
+            query['sql'] for query in queries.captured_queries
+            if 'room_event' in query['sql']
+            or 'room_reservation' in query['sql']
+        ])
+        self.assertEqual(event.reservations.count(), 1)
+        # Stored for the full TTL, not the lease of the running request.
+        self.assertGreater(
+            IdempotencyKey.objects.get(key='retry-1').expires_at,
+            timezone.now() + datetime.timedelta(
+                seconds=settings.IDEMPOTENCY_KEY_LEASE
+            )
+        )
+
+        response = self.client.post(
+            reverse('reservation-list'),
+            {
+                **data,
+                "event": reverse('event-detail', kwargs={'pk': other.pk}),
+            },
+            format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-1'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+        # Failed creates are not stored, the key can be retried.
+        self.logout()
+        self.login(self.staff_user)
+        event_data: dict = {
+            "name": "retried",
+            "room": reverse('room-detail', kwargs={'pk': event.room.pk}),
+            "starts_at": event.starts_at.isoformat(),
+            "ends_at": event.ends_at.isoformat(),
+        }
+        response = self.client.post(
+            reverse('event-list'),
+            event_data,
+            format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-2'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.filter(key='retry-2').exists())
+
+        event_data['starts_at'] = other.ends_at.isoformat()
+        event_data['ends_at'] = (
+            other.ends_at + datetime.timedelta(hours=1)
+        ).isoformat()
+        for _i in range(2):
+            response = self.client.post(
+                reverse('event-list'),
+                event_data,
+                format='json',
+                HTTP_IDEMPOTENCY_KEY='retry-2'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Event.objects.filter(name='retried').count(), 1)
+
+        # The key of a request that crashed is taken over once its lease
+        # ran out.
+        IdempotencyKey.objects.create(
+            user=self.staff_user,
+            key='retry-3',
+            fingerprint='crashed',
+            expires_at=timezone.now()
+        )
+        event_data['name'] = 'taken over'
+        event_data['starts_at'] = event_data['ends_at']
+        event_data['ends_at'] = (
+            other.ends_at + datetime.timedelta(hours=2)
+        ).isoformat()
+        response = self.client.post(
+            reverse('event-list'),
+            event_data,
+            format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-3'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            msg=response.content
+        )
+
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        call_command('purge_expired', stdout=io.StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_reserved_count(self) -> None:
+        event: Event = self._create_event(room=self._create_room(capacity=3))
+
+        self.login(self.user)
+        response = self.client.post(
+            reverse('reservation-list'),
+            {
+                "user": reverse('user-detail', kwargs={'pk': self.user.pk}),
+                "event": reverse('event-detail', kwargs={'pk': event.pk}),
+            },
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            msg=response.content
+        )
+
+        event.refresh_from_db()
+        self.assertEqual(event.reserved_count, 1)
+
+        self.logout()
+        self.login(self.staff_user)
+
+        response = self.client.get(
+            reverse('event-detail', kwargs={'pk': event.pk}),
+            format='json'
+        )
+        self.assertEqual(response.json()['remaining_capacity'], 2)
+
+        response = self.client.delete(
+            reverse(
+                'reservation-detail',
+                kwargs={'pk': event.reservations.get().pk}
+            ),
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_204_NO_CONTENT
+        )
+
+        event.refresh_from_db()
+        self.assertEqual(event.reserved_count, 0)
+
+    def test_reserved_count_cascade(self) -> None:
+        event: Event = self._create_event()
+        self._create_reservation(user=self.user, event=event)
+        self._create_reservation(user=self.staff_user, event=event)
+
+        event.refresh_from_db()
+        self.assertEqual(event.reserved_count, 2)
+
+        event.delete()
+
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_reconcile_reserved_counts(self) -> None:
+        event: Event = self._create_event()
+        self._create_reservation(user=self.user, event=event)
+        Event.objects.filter(pk=event.pk).update(reserved_count=9)
+
+        call_command(
+            'reconcile_reserved_counts',
+            '--dry-run',
+            stdout=io.StringIO()
+        )
+        event.refresh_from_db()
+        self.assertEqual(event.reserved_count, 9)
+
+        call_command('reconcile_reserved_counts', stdout=io.StringIO())
+        event.refresh_from_db()
+        self.assertEqual(event.reserved_count, 1)
+
+    def test_bulk_book(self) -> None:
+        full_event: Event = self._create_event(
+            room=self._create_room(capacity=1)
+        )
+        event: Event = self._create_event()
+        self._create_reservation(user=self.staff_user, event=event)
+
+        payload: List[dict] = [
+            {
+                "user": reverse('user-detail', kwargs={'pk': self.user.pk}),
+                "event": reverse('event-detail', kwargs={'pk': event.pk}),
+            },
+            {
+                "user": self.staff_user.pk,
+                "event": reverse('event-detail', kwargs={'pk': event.pk}),
+            },
+            {
+                "user": self.user.pk,
+                "event": full_event.pk,
+            },
+            {
+                "user": self.staff_user.pk,
+                "event": full_event.pk,
+            },
+            {
+                "user": self.user.pk,
+                "event": full_event.pk + event.pk,
+            },
+        ]
+
+        self.login(self.user)
+        response = self.client.post(
+            reverse('reservation-bulk'),
+            payload,
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+        self.logout()
+        self.login(self.staff_user)
+
+        response = self.client.post(
+            reverse('reservation-bulk'),
+            payload,
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_207_MULTI_STATUS,
+            msg=response.content
+        )
+        self.assertEqual(
+            [item['status'] for item in response.json()],
+            [201, 400, 201, 400, 400]
+        )
+
+        full_event.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual(full_event.reserved_count, 1)
+        self.assertEqual(event.reserved_count, 2)
+        self.assertEqual(Reservation.objects.count(), 3)
+
+    def test_bulk_book_constant_queries(self) -> None:
+        self.login(self.staff_user)
+
+        def count_queries(n_events: int) -> int:
+            users: List[User] = [
+                User.objects.create(username=f'bulk-{n_events}-{i}')
+                for i in range(n_events)
+            ]
+            payload: List[dict] = [
+                {"user": user.pk, "event": self._create_event().pk}
+                for user in users
+            ]
+
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(
+                    reverse('reservation-bulk'),
+                    payload,
+                    format='json'
+                )
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_201_CREATED,
+                msg=response.content
+            )
+            return len(ctx.captured_queries)
+
+        self.assertEqual(count_queries(2), count_queries(20))
+
+    def test_reservation_expand(self) -> None:
+        self.login(self.staff_user)
+
+        def grow(n_reservations: int) -> None:
+            for i in range(n_reservations):
+                self._create_reservation(
+                    user=User.objects.create(
+                        username=f'expand-{n_reservations}-{i}'
+                    )
+                )
+
+        def request() -> None:
+            response = self.client.get(
+                reverse('reservation-list'),
+                {'expand': 'event,user'},
+                format='json'
+            )
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_200_OK,
+                msg=response.content
+            )
+
+            item: dict = response.json()['results'][0]
+            self.assertIn('username', item['user'])
+            self.assertIn('remaining_capacity', item['event'])
+            self.assertTrue(item['event']['room'].startswith('http'))
+
+        self.assertQueryCountConstant(request, grow, sizes=(2, 10))
+
+    def test_reservation_export(self) -> None:
+        event: Event = self._create_event(
+            starts_at=at(datetime.date(2030, 1, 1))
+        )
+        other: Event = self._create_event(
+            starts_at=at(datetime.date(2030, 2, 1))
+        )
+        reservation: Reservation = self._create_reservation(
+            user=self.user,
+            event=event
+        )
+        self._create_reservation(user=self.staff_user, event=other)
+
+        self.login(self.user)
+        response = self.client.get(reverse('reservation-export'))
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+        self.logout()
+        self.login(self.staff_user)
+
+        response = self.client.get(
+            reverse('reservation-export'),
+            {'date_to': '2030-01-15'}
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK
+        )
+        self.assertTrue(response.streaming)
+        rows: List[dict] = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(reservation.pk))
+        self.assertEqual(rows[0]['username'], self.user.username)
+        self.assertEqual(
+            rows[0]['event_starts_at'],
+            '2030-01-01T09:00:00+00:00'
+        )
+
+        response = self.client.get(
+            reverse('reservation-export'),
+            {'format': 'ndjson', 'event': other.pk}
+        )
+        self.assertEqual(
+            response['Content-Type'],
+            'application/x-ndjson; charset=utf-8'
+        )
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [row['username'] for row in rows],
+            [self.staff_user.username]
+        )
+
+        response = self.client.get(
+            reverse('event-export'),
+            {'format': 'ndjson', 'room': event.room.pk}
+        )
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [(row['id'], row['reserved_count']) for row in rows],
+            [(event.pk, 1)]
+        )
+
+
+class AsyncReadAPITest(RoomBaseAPITestCase):
+    async def test_async_event_list(self) -> None:
+        private_event: Event = await sync_to_async(self._create_event)(
+            is_public=False
+        )
+        public_event: Event = await sync_to_async(self._create_event)(
+            is_public=True
+        )
+
+        response = await self.async_client.get(reverse('async-event-list'))
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK,
+            msg=response.content
+        )
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [public_event.pk]
+        )
+
+        response = await self.async_client.get(
+            reverse('async-event-detail', kwargs={'pk': private_event.pk})
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+        await sync_to_async(self.async_client.force_login)(self.staff_user)
+
+        response = await self.async_client.get(reverse('async-event-list'))
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [private_event.pk, public_event.pk]
+        )
+
+        sync_response = await sync_to_async(self.client.get)(
+            reverse('event-detail', kwargs={'pk': public_event.pk}),
+            {'expand': 'room'}
+        )
+        response = await self.async_client.get(
+            reverse('async-event-detail', kwargs={'pk': public_event.pk}),
+            {'expand': 'room'}
+        )
+        self.assertEqual(response.json(), sync_response.json())
+
+        response = await self.async_client.post(reverse('async-event-list'))
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    async def test_async_reservation_list(self) -> None:
+        reservation: Reservation = await sync_to_async(
+            self._create_reservation
+        )(user=self.user)
+        await sync_to_async(self._create_reservation)(user=self.staff_user)
+
+        response = await self.async_client.get(
+            reverse('async-reservation-list')
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+        await sync_to_async(self.async_client.force_login)(self.user)
+
+        response = await self.async_client.get(
+            reverse('async-reservation-list')
+        )
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [reservation.pk]
+        )
+
+    async def test_async_bad_token(self) -> None:
+        # Rejected as by the DRF views, not served as anonymous.
+        for name in ('room-list', 'event-list', 'reservation-list'):
+            sync_response = await sync_to_async(self.client.get)(
+                reverse(name),
+                HTTP_AUTHORIZATION='Token bad'
+            )
+            response = await self.async_client.get(
+                reverse(f'async-{name}'),
+                AUTHORIZATION='Token bad'
+            )
+            self.assertEqual(
+                (response.status_code, response.json()),
+                (sync_response.status_code, sync_response.json()),
+                msg=name
+            )
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_403_FORBIDDEN
+            )
+
+    @override_settings(DEBUG=True)
+    async def test_async_sql_instrumentation(self) -> None:
+        await sync_to_async(self._create_event)(is_public=True)
+
+        response = await self.async_client.get(reverse('async-event-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(int(response['X-SQL-Query-Count']), 1)
+
+        # Overlapping requests each count only their own queries.
+        responses = await asyncio.gather(*(
+            self.async_client.get(reverse('async-event-list'))
+            for _i in range(4)
+        ))
+        self.assertEqual(
+            [item['X-SQL-Query-Count'] for item in responses],
+            [response['X-SQL-Query-Count']] * 4
+        )
+
+
+OUTBOX_SETTINGS: dict = {
+    **settings.OUTBOX,
+    'HANDLERS': {
+        RESERVATION_CREATED: ['room.tests.record_message'],
+        RESERVATION_DELETED: ['room.tests.record_message'],
+        EVENT_RESCHEDULED: [
+            'room.tests.record_message',
+            'room.tests.fail_message',
+        ],
+    },
+    'MAX_ATTEMPTS': 2,
+}
+
+
+@override_settings(OUTBOX=OUTBOX_SETTINGS)
+class OutboxTest(RoomBaseAPITestCase):
+    def setUp(self) -> None:
+        delivered_messages.clear()
+        return super().setUp()
+
+    def run_worker(self) -> None:
+        with self.assertLogs('room.outbox', 'ERROR'):
+            call_command('run_outbox_worker', once=True, stdout=io.StringIO())
+
+    def test_enqueue(self) -> None:
+        event: Event = self._create_event()
+        reservation: Reservation = reserve(self.user, event)
+        bulk_reserve([(self.staff_user.pk, event.pk)])
+
+        # Rolled back with the change it reports.
+        with self.assertRaises(ValidationError):
+            with transaction.atomic():
+                reserve(self.staff_user, event)
+        self.assertEqual(
+            list(OutboxMessage.objects.order_by('id').values_list(
+                'topic',
+                'payload'
+            )),
+            [
+                (RESERVATION_CREATED, {
+                    'reservation': reservation.pk,
+                    'user': self.user.pk,
+                    'event': event.pk,
+                }),
+                (RESERVATION_CREATED, {
+                    'reservation': event.reservations.get(
+                        user=self.staff_user
+                    ).pk,
+                    'user': self.staff_user.pk,
+                    'event': event.pk,
+                }),
+            ]
+        )
+
+        event.name = 'renamed'
+        event.save()
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+        event.starts_at += datetime.timedelta(hours=1)
+        event.ends_at += datetime.timedelta(hours=1)
+        event.save()
+        reservation.delete()
+        self.assertEqual(
+            list(OutboxMessage.objects.order_by('id').values_list(
+                'topic',
+                flat=True
+            )[2:]),
+            [EVENT_RESCHEDULED, RESERVATION_DELETED]
+        )
+
+    def test_worker(self) -> None:
+        event: Event = self._create_event()
+        reserve(self.user, event)
+        event.ends_at += datetime.timedelta(hours=1)
+        event.save()
+
+        self.run_worker()
+        self.assertEqual(
+            [message.topic for message in delivered_messages],
+            [RESERVATION_CREATED, EVENT_RESCHEDULED]
+        )
+
+        # Delivered messages are gone, the failed one backs off.
+        failed: OutboxMessage = OutboxMessage.objects.get()
+        self.assertEqual(failed.topic, EVENT_RESCHEDULED)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn('calendar is down', failed.last_error)
+        self.assertGreater(failed.available_at, timezone.now())
+
+        call_command('run_outbox_worker', once=True, stdout=io.StringIO())
+        self.assertEqual(len(delivered_messages), 2)
+
+        # Given up on after MAX_ATTEMPTS.
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.run_worker()
+        failed.refresh_from_db()
+        self.assertEqual(failed.attempts, 2)
+        self.assertIsNone(failed.available_at)
+
+
+# Only the reservation's commit may trigger an update within the test.
+@override_settings(LIVE_CAPACITY={
+    **settings.LIVE_CAPACITY,
+    'POLL_SECONDS': 30,
+})
+class CapacityStreamTest(RoomBaseAPITestCase):
+    async def open_stream(
+        self,
+        query: str
+    ) -> Tuple[asyncio.Task, asyncio.Queue, asyncio.Queue]:
+        sent: asyncio.Queue = asyncio.Queue()
+        received: asyncio.Queue = asyncio.Queue()
+        await received.put({'type': 'http.request', 'body': b''})
+
+        task: asyncio.Task = asyncio.ensure_future(application(
+            {
+                'type': 'http',
+                'method': 'GET',
+                'path': STREAM_PATH,
+                'query_string': query.encode(),
+                'headers': [],
+            },
+            received.get,
+            sent.put
+        ))
+        return task, sent, received
+
+    async def read(self, sent: asyncio.Queue) -> List[dict]:
+        message: dict = await asyncio.wait_for(sent.get(), 5)
+        return [
+            json.loads(line.removeprefix('data: '))
+            for line in message['body'].decode().split('\n\n') if line
+        ]
+
+    async def test_capacity_stream(self) -> None:
+        event: Event = await sync_to_async(self._create_event)(
+            is_public=True
+        )
+        private_event: Event = await sync_to_async(self._create_event)()
+
+        task, sent, received = await self.open_stream(
+            f'events={event.pk},{private_event.pk}'
+        )
+        start: dict = await sent.get()
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        self.assertIn(
+            (b'content-type', b'text/event-stream'),
+            start['headers']
+        )
+        self.assertEqual(
+            await self.read(sent),
+            [{'event': event.pk, 'remaining_capacity': 14}]
+        )
+
+        def book() -> None:
+            with self.captureOnCommitCallbacks(execute=True):
+                reserve(self.user, event)
+
+        await sync_to_async(book)()
+        self.assertEqual(
+            await self.read(sent),
+            [{'event': event.pk, 'remaining_capacity': 13}]
+        )
+
+        await received.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+        self.assertFalse(broadcaster.subscribers)
+        if broadcaster.task is not None:
+            await asyncio.wait_for(broadcaster.task, 5)
+
+        task, sent, received = await self.open_stream('events=x')
+        await asyncio.wait_for(task, 5)
+        self.assertEqual(
+            (await sent.get())['status'],
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    async def close_stream(
+        self,
+        task: asyncio.Task,
+        received: asyncio.Queue
+    ) -> None:
+        await received.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+        if broadcaster.task is not None:
+            await asyncio.wait_for(broadcaster.task, 5)
+
+    async def test_capacity_stream_move(self) -> None:
+        # Moves update rows directly, without the reservation signals.
+        source: Event = await sync_to_async(self._create_event)(
+            is_public=True
+        )
+        target: Event = await sync_to_async(self._create_event)(
+            is_public=True
+        )
+        reservation: Reservation = await sync_to_async(
+            self._create_reservation
+        )(user=self.user, event=source)
+
+        task, sent, received = await self.open_stream(
+            f'events={source.pk},{target.pk}'
+        )
+        await sent.get()
+        self.assertCountEqual(
+            await self.read(sent),
+            [
+                {'event': source.pk, 'remaining_capacity': 13},
+                {'event': target.pk, 'remaining_capacity': 14},
+            ]
+        )
+
+        def move() -> None:
+            with self.captureOnCommitCallbacks(execute=True):
+                move_reservation(reservation, target)
+
+        await sync_to_async(move)()
+        self.assertCountEqual(
+            await self.read(sent),
+            [
+                {'event': source.pk, 'remaining_capacity': 14},
+                {'event': target.pk, 'remaining_capacity': 13},
+            ]
+        )
+
+        await self.close_stream(task, received)
+
+    async def test_capacity_stream_bulk(self) -> None:
+        # bulk_create() sends no post_save.
+        event: Event = await sync_to_async(self._create_event)(
+            is_public=True
+        )
+
+        task, sent, received = await self.open_stream(f'events={event.pk}')
+        await sent.get()
+        self.assertEqual(
+            await self.read(sent),
+            [{'event': event.pk, 'remaining_capacity': 14}]
+        )
+
+        def book() -> None:
+            with self.captureOnCommitCallbacks(execute=True):
+                bulk_reserve([
+                    (self.user.pk, event.pk),
+                    (self.staff_user.pk, event.pk),
+                ])
+
+        await sync_to_async(book)()
+        self.assertEqual(
+            await self.read(sent),
+            [{'event': event.pk, 'remaining_capacity': 12}]
+        )
+        self.assertEqual(
+            await sync_to_async(list)(
+                OutboxMessage.objects.filter(
+                    topic=RESERVATION_CREATED
+                ).order_by('id').values_list('payload__user', flat=True)
+            ),
+            [self.user.pk, self.staff_user.pk]
+        )
+
+        await self.close_stream(task, received)
+
+
+class ArchiveEventsTest(RoomBaseAPITestCase):
+    def test_archive_events(self) -> None:
+        room: Room = self._create_room(capacity=1)
+        past: Event = self._create_event(
+            room=room,
+            starts_at=at(datetime.date.today() - datetime.timedelta(days=60)),
+            is_public=True
+        )
+        reservation: Reservation = self._create_reservation(
+            user=self.user,
+            event=past
+        )
+        reserve(self.staff_user, past, waitlist=True)
+        private: Event = self._create_event(
+            room=room,
+            starts_at=past.ends_at
+        )
+        upcoming: Event = self._create_event(room=room)
+        OutboxMessage.objects.all().delete()
+
+        call_command(
+            'archive_events',
+            days=30,
+            batch_size=1,
+            stdout=io.StringIO()
+        )
+        self.assertEqual(list(Event.objects.all()), [upcoming])
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        # Nothing was cancelled.
+        self.assertFalse(OutboxMessage.objects.exists())
+
+        archived: ArchivedEvent = ArchivedEvent.objects.get(pk=past.pk)
+        self.assertEqual(archived.reserved_count, 1)
+        self.assertEqual(archived.starts_at, past.starts_at)
+        self.assertEqual(archived.created_at, past.created_at)
+        self.assertEqual(
+            list(archived.reservations.values_list('pk', 'user')),
+            [(reservation.pk, self.user.pk)]
+        )
+
+        response = self.client.get(reverse('archivedevent-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [past.pk]
+        )
+
+        self.login(self.user)
+        response = self.client.get(reverse('archivedreservation-list'))
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [reservation.pk]
+        )
+        response = self.client.post(reverse('archivedreservation-list'), {})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+        self.logout()
+        self.login(self.staff_user)
+        response = self.client.get(reverse('archivedevent-list'))
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [past.pk, private.pk]
+        )
+        self.assertFalse(ArchivedReservation.objects.filter(
+            user=self.staff_user
+        ).exists())
+
+        # Archived bookings keep their user, as live ones do.
+        with self.assertRaises(ProtectedError):
+            self.user.delete()
+
+
+class ImportBookingsTest(RoomBaseAPITestCase):
+    def write(self, name: str, content: str) -> str:
+        path: str = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        return super().setUp()
+
+    def test_import_bookings(self) -> None:
+        existing: Event = self._create_event(
+            starts_at=at(datetime.date(2030, 1, 1))
+        )
+
+        rooms: str = self.write('rooms.csv', (
+            'id,name,capacity\n'
+            f'{existing.room.pk + 100},hall,1\n'
+            f'{existing.room.pk},duplicate id,5\n'
+            ',annex,not-a-number\n'
+        ))
+        event_rows: List[dict] = [
+            {
+                'id': 500,
+                'name': 'a',
+                'room': existing.room.pk + 100,
+                'starts_at': '2030-01-01T09:00:00',
+                'ends_at': '2030-01-01T11:00:00',
+                'is_public': 'true'
+            },
+            {
+                'id': 501,
+                'name': 'b',
+                'room': existing.room.pk + 100,
+                'starts_at': '2030-01-01T10:00:00',
+                'ends_at': '2030-01-01T12:00:00'
+            },
+            {
+                'id': 502,
+                'name': 'c',
+                'room': existing.room.pk,
+                'starts_at': '2030-01-01T09:30:00+00:00',
+                'ends_at': '2030-01-01T10:00:00+00:00'
+            },
+            {
+                'id': 503,
+                'name': 'd',
+                'room': 999999,
+                'starts_at': '2030-01-02T09:00:00',
+                'ends_at': '2030-01-02T11:00:00'
+            },
+        ]
+        events: str = self.write(
+            'events.ndjson',
+            '\n'.join(
+                [json.dumps(row) for row in event_rows]
+                + ['{"id": 504, "name": ', '[1, 2]']
+            )
+        )
+        reservations: str = self.write('reservations.csv', (
+            'user,event\n'
+            f'{self.user.pk},500\n'
+            f'{self.staff_user.pk},500\n'
+            f'{self.user.pk},{existing.pk}\n'
+            f'{self.user.pk},{existing.pk}\n'
+        ))
+        rejects: str = os.path.join(self.directory.name, 'rejects.ndjson')
+
+        out: io.StringIO = io.StringIO()
+        call_command(
+            'import_bookings',
+            rooms=rooms,
+            events=events,
+            reservations=reservations,
+            rejects=rejects,
+            batch_size=2,
+            stdout=out
+        )
+
+        self.assertIn('rooms: 1 imported, 2 rejected', out.getvalue())
+        self.assertIn('events: 1 imported, 5 rejected', out.getvalue())
+        self.assertIn('reservations: 2 imported, 2 rejected', out.getvalue())
+
+        event: Event = Event.objects.get(pk=500)
+        self.assertTrue(event.is_public)
+        self.assertEqual(event.reserved_count, 1)
+        existing.refresh_from_db()
+        self.assertEqual(existing.reserved_count, 1)
+        # Loaded bookings are not announced to the outbox handlers.
+        self.assertFalse(
+            OutboxMessage.objects.filter(topic=RESERVATION_CREATED).exists()
+        )
+
+        with open(rejects) as f:
+            errors: List[dict] = [json.loads(line) for line in f]
+        self.assertEqual(
+            [(error['file'], error['line']) for error in errors],
+            [
+                ('rooms', 3),
+                ('rooms', 4),
+                ('events', 2),
+                ('events', 3),
+                ('events', 4),
+                ('events', 5),
+                ('events', 6),
+                ('reservations', 3),
+                ('reservations', 5),
+            ]
+        )
+
+        # Explicit ids must not break later inserts.
+        self._create_room()
+
+    @skipUnless(
+        connection.vendor == 'postgresql',
+        "SQLite ids never reuse a value, with or without a reset."
+    )
+    def test_import_bookings_keeps_sequences_forward(self) -> None:
+        # Ids of rows moved to the archive tables must not be handed out
+        # again.
+        reused: Room = self._create_room()
+        archived: Room = self._create_room()
+        Room.objects.filter(pk__in=(reused.pk, archived.pk)).delete()
+
+        call_command(
+            'import_bookings',
+            rooms=self.write(
+                'rooms.csv',
+                f'id,name,capacity\n{reused.pk},hall,1\n'
+            ),
+            stdout=io.StringIO()
+        )
+
+        self.assertGreater(self._create_room().pk, archived.pk)
+
+
+class SeedCommandTest(RoomBaseAPITestCase):
+    def seed(self, prefix: str) -> List[tuple]:
+        rooms_before: int = Room.objects.count()
+        call_command(
+            'seed',
+            users=40,
+            rooms=4,
+            events=30,
+            reservations=300,
+            seed=7,
+            prefix=prefix,
+            stdout=io.StringIO()
+        )
+        events: QuerySet = Event.objects.filter(
+            room__in=Room.objects.order_by('id')[rooms_before:]
+        ).order_by('id')
+        return list(events.values_list(
+            'name',
+            'starts_at',
+            'ends_at',
+            'is_public',
+            'reserved_count',
+            'room__capacity'
+        ))
+
+    def test_seed(self) -> None:
+        events: List[tuple] = self.seed('first')
+
+        self.assertEqual(len(events), 30)
+        self.assertEqual(User.objects.filter(
+            username__startswith='first-'
+        ).count(), 40)
+        self.assertTrue(all(
+            reserved <= min(capacity, 40)
+            for _name, _starts, _ends, _public, reserved, capacity in events
+        ))
+        self.assertTrue(any(
+            reserved == capacity
+            for _name, _starts, _ends, _public, reserved, capacity in events
+        ))
+        self.assertEqual(
+            Reservation.objects.count(),
+            sum(reserved for _n, _s, _e, _p, reserved, _c in events)
+        )
+        self.assertFalse(Event.objects.annotate(
+            actual=Count('reservations')
+        ).exclude(reserved_count=F('actual')).exists())
+
+        # Deterministic for a seed.
+        self.assertEqual(self.seed('second'), events)
+
+        with self.assertRaises(CommandError):
+            self.seed('second')
+
+
+class SignedTokenAuthenticationTest(RoomBaseAPITestCase):
+    def setUp(self) -> None:
+        user_cache.clear()
+        return super().setUp()
+
+    def get_token(self, user: User) -> str:
+        response = self.client.post(
+            reverse('api-token'),
+            {'username': user.username, 'password': self.password},
+            format='json'
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK,
+            msg=response.content
+        )
+        return response.json()['token']
+
+    def test_obtain_token(self) -> None:
+        self.get_token(self.user)
+
+        response = self.client.post(
+            reverse('api-token'),
+            {'username': self.user.username, 'password': 'wrong'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_token_reads_without_auth_queries(self) -> None:
+        self._create_reservation(user=self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.get_token(self.user)}'
+        )
+
+        for _i in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('reservation-list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()['results']), 1)
+
+        self.assertFalse([
+            query['sql'] for query in queries.captured_queries
+            if 'auth_user' in query['sql']
+            or 'django_session' in query['sql']
+        ])
+
+        response = self.client.get(reverse('async-reservation-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_token_invalidation(self) -> None:
+        token: str = self.get_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # Saving the user drops the cached fields.
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with override_settings(TOKEN_AUTH={
+            **settings.TOKEN_AUTH,
+            'MAX_AGE': -1,
+        }):
+            response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.json()['detail'], 'Token has expired.')
+
+        # A password change revokes the tokens issued before it.
+        self.user.set_password('pug-steve-321')
+        self.user.save()
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}x')
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.json()['detail'], 'Invalid token.')
+
+
+REPLICA_SETTINGS: dict = {
+    'ALIASES': ['replica_0'],
+    'STICKY_SECONDS': 5,
+    'CACHE_ALIAS': 'default',
+}
+
+
+class ReadReplicaRouterTest(RoomBaseAPITestCase):
+    @override_settings(READ_REPLICAS=REPLICA_SETTINGS)
+    def test_router(self) -> None:
+        router: ReadReplicaRouter = ReadReplicaRouter()
+        event: Event = self._create_event()
+        event._state.db = 'replica_0'
+
+        self.assertIsNone(router.db_for_read(Event))
+
+        token = use_replica()
+        try:
+            self.assertEqual(router.db_for_read(Event), 'replica_0')
+        finally:
+            release_replica(token)
+
+        self.assertIsNone(router.db_for_read(Event))
+        self.assertEqual(
+            router.db_for_write(Event, instance=event),
+            'default'
+        )
+        self.assertTrue(router.allow_relation(event, self.user))
+        self.assertFalse(router.allow_migrate('replica_0', 'room'))
+        self.assertIsNone(router.allow_migrate('default', 'room'))
+
+    @override_settings(READ_REPLICAS=REPLICA_SETTINGS)
+    def test_pin_to_primary(self) -> None:
+        self.assertFalse(is_pinned(self.user))
+
+        pin_to_primary(self.user)
+
+        self.assertTrue(is_pinned(self.user))
+        self.assertFalse(is_pinned(self.staff_user))
+
+
+@skipUnless(
+    settings.READ_REPLICAS['ALIASES'],
+    "Needs a replica, e.g. POSTGRES_REPLICA_HOSTS pointing at the primary."
+)
+class ReadReplicaAPITest(TransactionTestCase):
+    databases = '__all__'
+
+    def count_queries(self, method: str, path: str, **kwargs) -> dict:
+        replica: str = settings.READ_REPLICAS['ALIASES'][0]
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[replica]) as replicated:
+            response = getattr(self.client, method)(
+                path,
+                format='json',
+                **kwargs
+            )
+
+        self.assertLess(response.status_code, 400, msg=response.content)
+        return {'primary': len(primary), 'replica': len(replicated)}
+
+    @override_settings(READ_REPLICAS={
+        **settings.READ_REPLICAS,
+        'ALIASES': settings.READ_REPLICAS['ALIASES'][:1],
+    })
+    def test_read_your_writes(self) -> None:
+        cache.clear()
+        user: User = User.objects.create(username='steve')
+        room: Room = Room.objects.create(name="steve's room", capacity=2)
+        event: Event = Event.objects.create(
+            room=room,
+            name="steve's event",
+            starts_at=at(datetime.date.today()),
+            ends_at=at(datetime.date.today(), 11),
+            is_public=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        self.assertEqual(
+            self.count_queries('get', reverse('event-list')),
+            {'primary': 0, 'replica': 1}
+        )
+
+        self.count_queries('post', reverse('reservation-list'), data={
+            'event': reverse('event-detail', args=(event.pk, )),
+            'user': reverse('user-detail', args=(user.pk, )),
+        })
+        queries: dict = self.count_queries('get', reverse('reservation-list'))
+        self.assertEqual(queries['replica'], 0)
+        self.assertGreater(queries['primary'], 0)
+
+        get_pin_cache().delete(pin_key(user))
+        queries = self.count_queries('get', reverse('reservation-list'))
+        self.assertEqual(queries['primary'], 0)
+        self.assertGreater(queries['replica'], 0)
+
+
+class ReservationAdmissionTest(TransactionTestCase):
+    def test_reserve_rejects_duplicate(self) -> None:
+        user: User = User.objects.create(username='steve')
+        room: Room = Room.objects.create(name="steve's room", capacity=2)
+        event: Event = Event.objects.create(
+            room=room,
+            name="steve's event",
+            starts_at=at(datetime.date.today()),
+            ends_at=at(datetime.date.today(), 11)
+        )
+
+        reserve(user, event)
+
+        with self.assertRaises(ValidationError):
+            reserve(user, event)
+
+        self.assertEqual(event.reservations.count(), 1)
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_reserve_does_not_overbook(self) -> None:
+        capacity: int = 5
+        room: Room = Room.objects.create(name="steve's room", capacity=capacity)
+        event: Event = Event.objects.create(
+            room=room,
+            name="steve's event",
+            starts_at=at(datetime.date.today()),
+            ends_at=at(datetime.date.today(), 11)
+        )
+        users: List[User] = [
+            User.objects.create(username=f'steve-{i}') for i in range(25)
+        ]
+        barrier: threading.Barrier = threading.Barrier(len(users))
+
+        def book(user: User) -> None:
+            barrier.wait()
+            try:
+                reserve(user, event)
+            except ValidationError:
+                pass
+            finally:
+                connection.close()
+
+        threads: List[threading.Thread] = [
+            threading.Thread(target=book, args=(user, )) for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(event.reservations.count(), capacity)
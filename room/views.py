@@ -1,38 +1,359 @@
-from rest_framework import viewsets
+import datetime
+import hashlib
+import json
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import (
+    SAFE_METHODS,
     IsAuthenticated,
     IsAdminUser,
 )
 from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import QuerySet
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.translation import gettext_lazy as _
 
+from room_manager.models import BaseModel
 from room_manager.permissions import ReadOnly
+from room_manager.routers import (
+    current_replica,
+    get_sticky_seconds,
+    is_pinned,
+    pin_to_primary,
+    release_replica,
+    use_replica,
+)
 
+from room.exports import (
+    CSVRenderer,
+    NDJSONRenderer,
+    stream_export,
+)
+from room.cache import (
+    get_cache,
+    get_timeout,
+    make_key,
+)
 from room.models import (
     Room,
     Event,
     Reservation,
+    IdempotencyKey,
+    ArchivedEvent,
+    ArchivedReservation,
+    held_count,
+    overlapping,
+)
+from room.pagination import (
+    UserPagination,
+    RoomPagination,
+    EventPagination,
+    ReservationPagination,
 )
 from room.serializers import (
     RoomSerializer,
     EventSerializer,
     UserSerializer,
-    ReservationSerializer
+    ReservationSerializer,
+    BulkReservationItemSerializer,
+    EventSeriesSerializer,
+    RoomAvailabilitySerializer,
+    WaitlistEntrySerializer,
+    SeatHoldSerializer,
+    ArchivedEventSerializer,
+    ArchivedReservationSerializer,
+    Waitlisted,
+    EventExportFilterSerializer,
+    ReservationExportFilterSerializer,
+    get_query_list,
+)
+from room.services import (
+    bulk_reserve,
+    create_event_series,
+    hold_seat,
+    release_hold,
 )
 
 
-class UserModelViewSet(viewsets.ReadOnlyModelViewSet):
+class ExpandQuerysetMixin:
+    # Joins whatever ``?expand=`` asks the serializer to nest, so expanded
+    # lists stay at a constant number of queries.
+    expand_select_related: Dict[str, Tuple[str, ...]] = {}
+    expand_prefetch_related: Dict[str, Tuple[str, ...]] = {}
+
+    def get_queryset(self) -> QuerySet:
+        qs: QuerySet = super().get_queryset()
+
+        for name in get_query_list(self.request, 'expand'):
+            qs = qs.select_related(
+                *self.expand_select_related.get(name, ())
+            ).prefetch_related(
+                *self.expand_prefetch_related.get(name, ())
+            )
+
+        return qs
+
+
+class ReplicaReadMixin:
+    # Safe requests read from a replica, unless the user wrote within the
+    # sticky window; a successful write pins the user to the primary.
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if request.method in SAFE_METHODS and not is_pinned(request.user):
+            self._replica_token = use_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        release_replica(getattr(self, '_replica_token', None))
+        self._replica_token = None
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class IdempotentCreateMixin:
+    # A create sent with an Idempotency-Key header runs once per user and
+    # key; retries get the stored response back from a single lookup of
+    # IdempotencyKey, without the event or reservation tables. Only 2xx
+    # responses are stored, a failed create can be retried with the key.
+
+    def create(self, request, *args, **kwargs):
+        key: Optional[str] = request.headers.get('Idempotency-Key')
+        if not key:
+            return self.create_response(request, *args, **kwargs)
+
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise ValidationError(
+                {'Idempotency-Key': _("Key is too long.")}
+            )
+
+        fingerprint: str = hashlib.sha256('\n'.join((
+            request.path,
+            json.dumps(request.data, sort_keys=True, default=str),
+        )).encode()).hexdigest()
+        now: datetime.datetime = timezone.now()
+        # Claimed for a short lease, the full TTL starts once it is stored.
+        expires_at: datetime.datetime = now + datetime.timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_LEASE
+        )
+
+        stored: Optional[IdempotencyKey] = IdempotencyKey.objects.filter(
+            user_id=request.user.pk,
+            key=key
+        ).first()
+        if stored is not None and stored.expires_at > now:
+            return self.replay(stored, fingerprint)
+
+        if stored is not None:
+            # Expired but not purged yet: take it over, unless a concurrent
+            # request did first.
+            claimed: int = IdempotencyKey.objects.filter(
+                pk=stored.pk,
+                expires_at__lte=now
+            ).update(
+                fingerprint=fingerprint,
+                status_code=None,
+                response=None,
+                expires_at=expires_at,
+                updated_at=now
+            )
+            if not claimed:
+                return self.replay(
+                    IdempotencyKey.objects.get(pk=stored.pk),
+                    fingerprint
+                )
+        else:
+            try:
+                with transaction.atomic():
+                    stored = IdempotencyKey.objects.create(
+                        user_id=request.user.pk,
+                        key=key,
+                        fingerprint=fingerprint,
+                        expires_at=expires_at
+                    )
+            except IntegrityError:
+                return self.replay(
+                    IdempotencyKey.objects.get(
+                        user_id=request.user.pk,
+                        key=key
+                    ),
+                    fingerprint
+                )
+
+        try:
+            response: Response = self.create_response(
+                request,
+                *args,
+                **kwargs
+            )
+        except Exception:
+            stored.delete()
+            raise
+
+        if not status.is_success(response.status_code):
+            stored.delete()
+            return response
+
+        now = timezone.now()
+        IdempotencyKey.objects.filter(pk=stored.pk).update(
+            status_code=response.status_code,
+            response=response.data,
+            expires_at=now + datetime.timedelta(
+                seconds=settings.IDEMPOTENCY_KEY_TTL
+            ),
+            updated_at=now
+        )
+        return response
+
+    def create_response(self, request, *args, **kwargs) -> Response:
+        # What create() does without a key; override this, not create().
+        return super().create(request, *args, **kwargs)
+
+    def replay(self, stored: IdempotencyKey, fingerprint: str) -> Response:
+        if stored.fingerprint != fingerprint:
+            return Response(
+                {'detail': _(
+                    "Idempotency-Key was used for a different request."
+                )},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+
+        if stored.status_code is None:
+            return Response(
+                {'detail': _(
+                    "A request with this Idempotency-Key is in progress."
+                )},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(
+            stored.response,
+            status=stored.status_code,
+            headers={'Idempotent-Replayed': 'true'}
+        )
+
+
+class PublicResponseCacheMixin:
+    # Caches list/retrieve responses for non-staff users, who all see the
+    # same public data, and answers conditional GETs from the cached
+    # ETag/Last-Modified without touching the database.
+
+    def is_public_request(self) -> bool:
+        user: User = self.request.user
+        return not user.is_authenticated or not user.is_staff
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(self.build_list_response)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(self.build_retrieve_response)
+
+    def build_list_response(self) -> Tuple[Response, List[BaseModel]]:
+        queryset: QuerySet = self.filter_queryset(self.get_queryset())
+        page: List[BaseModel] = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        # No Last-Modified: deleting a row or making it private would not
+        # move it, so lists are validated by their ETag only.
+        return self.get_paginated_response(serializer.data), []
+
+    def build_retrieve_response(self) -> Tuple[Response, List[BaseModel]]:
+        instance: BaseModel = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data), [instance]
+
+    def get_last_modified(
+        self,
+        instances: List[BaseModel]
+    ) -> Optional[datetime.datetime]:
+        return max(
+            (instance.updated_at for instance in instances),
+            default=None
+        )
+
+    def get_cache_timeout(self) -> Optional[int]:
+        timeout: Optional[int] = get_timeout()
+        if current_replica() is None:
+            return timeout
+
+        # Built from a replica that may lag the invalidating write, so keep
+        # it no longer than the lag the sticky window allows for.
+        return min(timeout or get_sticky_seconds(), get_sticky_seconds())
+
+    def get_cached_response(
+        self,
+        build: Callable[[], Tuple[Response, List[BaseModel]]]
+    ):
+        if not self.is_public_request():
+            response, _instances = build()
+            return response
+
+        key: str = make_key(self.action, {
+            # The data holds absolute hyperlinks built from scheme and host.
+            'base_url': self.request.build_absolute_uri('/'),
+            'kwargs': sorted(self.kwargs.items()),
+            'query': sorted(self.request.query_params.lists()),
+            'media_type': self.request.accepted_media_type,
+        })
+        entry: Optional[dict] = get_cache().get(key)
+
+        if entry is None:
+            response, instances = build()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            content: bytes = JSONRenderer().render(response.data)
+            entry = {
+                'data': response.data,
+                'etag': quote_etag(hashlib.md5(content).hexdigest()),
+                'last_modified': self.get_last_modified(instances),
+            }
+            get_cache().set(key, entry, self.get_cache_timeout())
+        else:
+            response = Response(entry['data'])
+
+        last_modified: Optional[int] = None
+        if entry['last_modified'] is not None:
+            last_modified = int(entry['last_modified'].timestamp())
+            response['Last-Modified'] = http_date(last_modified)
+        response['ETag'] = entry['etag']
+
+        return get_conditional_response(
+            self.request,
+            etag=entry['etag'],
+            last_modified=last_modified,
+            response=response
+        )
+
+
+class UserModelViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = UserPagination
 
 
-class RoomModelViewSet(viewsets.ModelViewSet):
+class RoomModelViewSet(
+    ReplicaReadMixin,
+    IdempotentCreateMixin,
+    viewsets.ModelViewSet
+):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
     permission_classes = [IsAdminUser | ReadOnly]
+    pagination_class = RoomPagination
 
     def destroy(self, request, *args, **kwargs):
         instance: Room = self.get_object()
@@ -41,28 +362,160 @@ class RoomModelViewSet(viewsets.ModelViewSet):
 
         return super().destroy(request, *args, **kwargs)
 
+    @action(detail=False, methods=['get'], url_path='available')
+    def available(self, request):
+        params = RoomAvailabilitySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        # NOT EXISTS anti-join, answered per room by a bounded range scan of
+        # the (room, starts_at) index.
+        booked: QuerySet = Event.objects.filter(
+            overlapping(
+                params.validated_data['start'],
+                params.validated_data['end']
+            ),
+            room=OuterRef('pk')
+        )
+        qs: QuerySet = self.get_queryset().filter(
+            ~Exists(booked),
+            capacity__gte=params.validated_data['capacity']
+        )
+
+        page = self.paginate_queryset(qs)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
-class EventModelViewSet(viewsets.ModelViewSet):
-    queryset = Event.objects.all()
+class EventModelViewSet(
+    ReplicaReadMixin,
+    IdempotentCreateMixin,
+    ExpandQuerysetMixin,
+    PublicResponseCacheMixin,
+    viewsets.ModelViewSet
+):
+    queryset = Event.objects.select_related('room')
     serializer_class = EventSerializer
     permission_classes = [IsAdminUser | ReadOnly]
+    pagination_class = EventPagination
+    expand_select_related = {
+        'room': ('room', ),
+    }
 
     def get_queryset(self) -> QuerySet:
-        qs: QuerySet = super().get_queryset()
-        user: User = self.request.user
+        # Live holds count against remaining_capacity, as in the stream.
+        qs: QuerySet = super().get_queryset().annotate(
+            held_count=held_count()
+        )
 
-        if not user.is_authenticated or not user.is_staff:
+        if self.is_public_request():
             qs = qs.filter(is_public=True)
 
         return qs
 
+    def get_last_modified(
+        self,
+        instances: List[Event]
+    ) -> Optional[datetime.datetime]:
+        # remaining_capacity changes when a hold runs out, which no
+        # updated_at records, so events are validated by their ETag only.
+        return None
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        permission_classes=[IsAdminUser],
+        renderer_classes=[CSVRenderer, NDJSONRenderer]
+    )
+    def export(self, request):
+        params = EventExportFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        return stream_export(
+            params.filter(Event.objects.order_by('pk')),
+            (
+                ('id', 'pk'),
+                ('name', 'name'),
+                ('starts_at', 'starts_at'),
+                ('ends_at', 'ends_at'),
+                ('is_public', 'is_public'),
+                ('room_id', 'room_id'),
+                ('room_name', 'room__name'),
+                ('capacity', 'room__capacity'),
+                ('reserved_count', 'reserved_count'),
+            ),
+            request.accepted_renderer.format,
+            'events'
+        )
+
+    @action(detail=False, methods=['post'], url_path='series')
+    def series(self, request):
+        serializer = EventSeriesSerializer(
+            data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+
+        events, clashes = create_event_series(**serializer.validated_data)
+        conflicts: List[str] = [
+            serializers.DateTimeField().to_representation(starts_at)
+            for starts_at in clashes
+        ]
+        if not events and conflicts:
+            raise ValidationError({'conflicts': conflicts})
 
-class ReservationSerializerModelViewSet(viewsets.ModelViewSet):
+        return Response(
+            {
+                'events': self.get_serializer(events, many=True).data,
+                'conflicts': conflicts,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(
+        detail=True,
+        methods=['post', 'delete'],
+        url_path='hold',
+        permission_classes=[IsAuthenticated]
+    )
+    def hold(self, request, pk=None):
+        # First step of checkout: the seat counts as taken until the hold
+        # expires, is released, or becomes a reservation.
+        event: Event = self.get_object()
+
+        if request.method == 'DELETE':
+            release_hold(request.user, event)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        try:
+            hold = hold_seat(request.user, event)
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages)
+
+        serializer = SeatHoldSerializer(
+            hold,
+            context=self.get_serializer_context()
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ReservationSerializerModelViewSet(
+    ReplicaReadMixin,
+    IdempotentCreateMixin,
+    ExpandQuerysetMixin,
+    viewsets.ModelViewSet
+):
     permission_classes = [
         IsAuthenticated,
     ]
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    pagination_class = ReservationPagination
+    bulk_max_items: int = 1000
+    expand_select_related = {
+        'event': ('event__room', ),
+        'user': ('user', ),
+    }
 
     def get_queryset(self):
         qs: QuerySet = super().get_queryset()
@@ -71,3 +524,128 @@ class ReservationSerializerModelViewSet(viewsets.ModelViewSet):
             return qs
 
         return qs.filter(user=self.request.user)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        permission_classes=[IsAdminUser],
+        renderer_classes=[CSVRenderer, NDJSONRenderer]
+    )
+    def export(self, request):
+        params = ReservationExportFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        return stream_export(
+            params.filter(Reservation.objects.order_by('pk')),
+            (
+                ('id', 'pk'),
+                ('created_at', 'created_at'),
+                ('user_id', 'user_id'),
+                ('username', 'user__username'),
+                ('first_name', 'user__first_name'),
+                ('last_name', 'user__last_name'),
+                ('email', 'user__email'),
+                ('event_id', 'event_id'),
+                ('event_name', 'event__name'),
+                ('event_starts_at', 'event__starts_at'),
+                ('event_ends_at', 'event__ends_at'),
+                ('room_id', 'event__room_id'),
+                ('room_name', 'event__room__name'),
+            ),
+            request.accepted_renderer.format,
+            'reservations'
+        )
+
+    def create_response(self, request, *args, **kwargs):
+        try:
+            return super().create_response(request, *args, **kwargs)
+        except Waitlisted as e:
+            serializer = WaitlistEntrySerializer(
+                e.entry,
+                context=self.get_serializer_context()
+            )
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        permission_classes=[IsAdminUser]
+    )
+    def bulk(self, request):
+        serializer = BulkReservationItemSerializer(
+            data=request.data,
+            many=True,
+            max_length=self.bulk_max_items,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+
+        results: List[Union[Reservation, DjangoValidationError]] = bulk_reserve([
+            (item['user'], item['event']) for item in serializer.validated_data
+        ])
+
+        data: List[dict] = []
+        for result in results:
+            if isinstance(result, DjangoValidationError):
+                data.append({
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': result.messages,
+                })
+            else:
+                data.append({
+                    'status': status.HTTP_201_CREATED,
+                    'reservation': self.get_serializer(result).data,
+                })
+
+        all_created: bool = all(
+            item['status'] == status.HTTP_201_CREATED for item in data
+        )
+        return Response(
+            data,
+            status=(
+                status.HTTP_201_CREATED
+                if all_created else
+                status.HTTP_207_MULTI_STATUS
+            )
+        )
+
+
+class ArchivedEventModelViewSet(
+    ReplicaReadMixin,
+    viewsets.ReadOnlyModelViewSet
+):
+    # Events moved out by archive_events; visible like live events.
+    queryset = ArchivedEvent.objects.all()
+    serializer_class = ArchivedEventSerializer
+    permission_classes = [IsAdminUser | ReadOnly]
+    pagination_class = EventPagination
+
+    def get_queryset(self) -> QuerySet:
+        qs: QuerySet = super().get_queryset()
+
+        if not self.request.user.is_staff:
+            qs = qs.filter(is_public=True)
+
+        return qs
+
+
+class ArchivedReservationModelViewSet(
+    ReplicaReadMixin,
+    viewsets.ReadOnlyModelViewSet
+):
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    queryset = ArchivedReservation.objects.all()
+    serializer_class = ArchivedReservationSerializer
+    pagination_class = ReservationPagination
+
+    def get_queryset(self) -> QuerySet:
+        qs: QuerySet = super().get_queryset()
+
+        if self.request.user.is_staff:
+            return qs
+
+        return qs.filter(user=self.request.user)
@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'room_manager.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up.
+from room.live import STREAM_PATH, capacity_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Streams are long-lived, so they bypass Django's request handling
+    # rather than holding a worker thread each.
+    if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        return await capacity_stream(scope, receive, send)
+
+    return await django_application(scope, receive, send)
@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from rest_framework import authentication, exceptions
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_lazy as _
+
+SALT: str = 'room_manager.authentication'
+
+# The only User fields a token user is loaded with; the rest are deferred
+# and would cost a query on access. In model field order, as from_db()
+# expects.
+USER_FIELDS: Tuple[str, ...] = (
+    'id',
+    'is_superuser',
+    'username',
+    'is_staff',
+    'is_active',
+)
+
+# (cached at, USER_FIELDS values, password fingerprint)
+CachedUser = Tuple[float, tuple, str]
+
+
+def get_token_settings() -> dict:
+    return settings.TOKEN_AUTH
+
+
+def get_fingerprint(user: User) -> str:
+    # Changes with the password, so a password change revokes the tokens.
+    return user.get_session_auth_hash()[:16]
+
+
+def make_token(user: User) -> str:
+    return signing.TimestampSigner(salt=SALT).sign(
+        f'{user.pk}:{get_fingerprint(user)}'
+    )
+
+
+class UserCache:
+    """
+    Per-process LRU of the fields token users are built from. Entries are
+    dropped when the user is saved or deleted in this process; other
+    processes see the change once the entry is ``CACHE_SECONDS`` old.
+    """
+    def __init__(self) -> None:
+        self._entries: 'OrderedDict[int, CachedUser]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk: int) -> Optional[Tuple[tuple, str]]:
+        with self._lock:
+            entry: Optional[CachedUser] = self._entries.get(pk)
+            if entry is None:
+                return None
+
+            cached_at, values, fingerprint = entry
+            if time.monotonic() - cached_at > get_token_settings()[
+                'CACHE_SECONDS'
+            ]:
+                del self._entries[pk]
+                return None
+
+            self._entries.move_to_end(pk)
+            return values, fingerprint
+
+    def set(self, pk: int, values: tuple, fingerprint: str) -> None:
+        with self._lock:
+            self._entries[pk] = (time.monotonic(), values, fingerprint)
+            self._entries.move_to_end(pk)
+
+            while len(self._entries) > get_token_settings()['CACHE_SIZE']:
+                self._entries.popitem(last=False)
+
+    def delete(self, pk: int) -> None:
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache: UserCache = UserCache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance: User, **kwargs) -> None:
+    user_cache.delete(instance.pk)
+
+
+def load_user(pk: int) -> Optional[Tuple[User, str]]:
+    # Returns the user, with only USER_FIELDS loaded, and the fingerprint
+    # tokens are checked against. Queries only on a cache miss.
+    cached: Optional[Tuple[tuple, str]] = user_cache.get(pk)
+    if cached is None:
+        user: Optional[User] = User.objects.using(DEFAULT_DB_ALIAS).only(
+            *USER_FIELDS,
+            'password'
+        ).filter(pk=pk).first()
+        if user is None:
+            return None
+
+        cached = (
+            tuple(getattr(user, name) for name in USER_FIELDS),
+            get_fingerprint(user)
+        )
+        user_cache.set(pk, *cached)
+
+    values, fingerprint = cached
+    return User.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, values), fingerprint
+
+
+def authenticate_token(token: str) -> User:
+    try:
+        value: str = signing.TimestampSigner(salt=SALT).unsign(
+            token,
+            max_age=get_token_settings()['MAX_AGE']
+        )
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed(_("Token has expired."))
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+    pk, _sep, fingerprint = value.partition(':')
+    loaded: Optional[Tuple[User, str]] = load_user(int(pk))
+    if loaded is None or not constant_time_compare(loaded[1], fingerprint):
+        raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+    user: User = loaded[0]
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+    return user
+
+
+def get_token(request) -> Optional[str]:
+    header = authentication.get_authorization_header(request).split()
+    if not header or header[0].lower() != b'token':
+        return None
+
+    if len(header) != 2:
+        raise exceptions.AuthenticationFailed(_("Invalid token header."))
+
+    try:
+        return header[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(_("Invalid token header."))
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    ``Authorization: Token <token>`` with a signed, expiring token from
+    room_manager.views.SignedTokenView. The signature is checked without the
+    database and the user comes from user_cache, so a warm request makes no
+    auth queries.
+
+    Sends no WWW-Authenticate header, so unauthenticated requests keep the
+    403 the session authentication gives them.
+    """
+    def authenticate(self, request) -> Optional[Tuple[User, str]]:
+        token: Optional[str] = get_token(request)
+        if token is None:
+            return None
+
+        return authenticate_token(token), token
+
@@ -0,0 +1,48 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Func
+
+
+class TsTzRange(Func):
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+def has_exclusion_constraints(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return PostgresExclusionConstraint.is_supported(connections[using])
+
+
+class PostgresExclusionConstraint(ExclusionConstraint):
+    """
+    ExclusionConstraint that is skipped on other databases, so the schema
+    still migrates on the SQLite stand-ins. There, whatever the constraint
+    guards has to be checked by the application.
+    """
+    @staticmethod
+    def is_supported(connection) -> bool:
+        return connection.vendor == 'postgresql'
+
+    def constraint_sql(self, model, schema_editor):
+        if not self.is_supported(schema_editor.connection):
+            return None
+
+        return super().constraint_sql(model, schema_editor)
+
+    def create_sql(self, model, schema_editor):
+        if not self.is_supported(schema_editor.connection):
+            return None
+
+        return super().create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        if not self.is_supported(schema_editor.connection):
+            return None
+
+        return super().remove_sql(model, schema_editor)
+
+    def validate(self, model, instance, exclude=None, using='default'):
+        if not self.is_supported(connections[using]):
+            return
+
+        return super().validate(model, instance, exclude, using)
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('room_manager.sql')
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def query_shape(sql: str) -> str:
+    # Literals (inlined numbers such as LIMIT, or interpolated parameters in
+    # captured SQL) become placeholders and IN lists of any length fold into
+    # one, so the same lookup repeated per row shares a shape.
+    sql = NUMBER.sub('%s', STRING.sub('%s', sql))
+    return IN_LIST.sub('(%s, ...)', sql)
+
+
+class QueryStats:
+    """
+    Execute wrapper that counts queries, total SQL time and how often each
+    query shape ran.
+    """
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.seconds: float = 0.0
+        self.shapes: Dict[str, int] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql: str, seconds: float = 0.0) -> None:
+        self.seconds += seconds
+        self.count += 1
+        shape: str = query_shape(sql)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    @property
+    def duplicates(self) -> List[Tuple[str, int]]:
+        return sorted(
+            (
+                (shape, n) for shape, n in self.shapes.items() if n > 1
+            ),
+            key=lambda item: -item[1]
+        )
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(n - 1 for _shape, n in self.duplicates)
+
+
+# The stats of the request being handled. A context variable follows the
+# request into sync_to_async threads and keeps overlapping requests apart.
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    'current_stats',
+    default=None
+)
+
+
+def record_query(execute, sql, params, many, context):
+    stats: Optional[QueryStats] = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    return stats(execute, sql, params, many, context)
+
+
+def install_wrapper() -> None:
+    # Once per connection of the calling thread, and first in the list so
+    # the LIFO pops of execute_wrapper() blocks around it are unaffected.
+    for alias in connections:
+        wrappers: list = connections[alias].execute_wrappers
+        if record_query not in wrappers:
+            wrappers.insert(0, record_query)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the SQL issued while handling a request. With DEBUG the numbers
+    are returned as X-SQL-* headers, otherwise they are logged to the
+    ``room_manager.sql`` logger, at WARNING from SQL_LOG_WARNING_QUERIES
+    queries on.
+
+    Connections are per thread, so for async requests the wrapper is
+    installed in the thread-sensitive worker thread the request's ORM calls
+    run in. Queries from sync_to_async(thread_sensitive=False) are missed.
+    """
+    sync_capable: bool = True
+    async_capable: bool = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.is_async: bool = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        install_wrapper()
+        stats: QueryStats = QueryStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+
+        self.report(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        await sync_to_async(install_wrapper)()
+        stats: QueryStats = QueryStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+
+        self.report(request, response, stats)
+        return response
+
+    def report(self, request, response, stats: QueryStats) -> None:
+        milliseconds: float = stats.seconds * 1000
+
+        if settings.DEBUG:
+            response['X-SQL-Query-Count'] = str(stats.count)
+            response['X-SQL-Time-Ms'] = f'{milliseconds:.2f}'
+            response['X-SQL-Duplicate-Queries'] = str(stats.duplicate_count)
+            return
+
+        match = getattr(request, 'resolver_match', None)
+        logger.log(
+            logging.WARNING
+            if stats.count >= settings.SQL_LOG_WARNING_QUERIES
+            else logging.INFO,
+            "%s %s queries=%d sql_ms=%.2f duplicates=%d",
+            request.method,
+            match.view_name if match else request.path,
+            stats.count,
+            milliseconds,
+            stats.duplicate_count,
+            extra={'duplicated_shapes': stats.duplicates[:5]}
+        )
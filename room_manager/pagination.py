@@ -0,0 +1,206 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Tuple, Type
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model, Q, QuerySet
+from django.utils.translation import gettext_lazy as _
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite, ascending key such as (starts_at, id).
+
+    Unlike DRF's CursorPagination, the cursor carries every ordering column,
+    so a page is always a single index range scan, whatever its depth.
+    """
+    ordering: Tuple[str, ...] = ('id', )
+    page_size: int = 50
+    max_page_size: int = 200
+
+    cursor_query_param: str = 'cursor'
+    page_size_query_param: str = 'page_size'
+    invalid_cursor_message: str = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None) -> List[Any]:
+        return self.paginate_results(
+            list(self.get_page_queryset(queryset, request))
+        )
+
+    def get_page_queryset(self, queryset: QuerySet, request) -> QuerySet:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.cursor, self.reverse = self.decode_cursor(request)
+        if self.cursor is not None:
+            self.cursor = self.clean_cursor(queryset.model, self.cursor)
+
+        ordering: List[str] = list(self.ordering)
+        if self.reverse:
+            ordering = [f'-{field}' for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.cursor))
+
+        # One extra row tells whether there is another page.
+        return queryset[:self.page_size + 1]
+
+    def paginate_results(self, results: List[Any]) -> List[Any]:
+        has_more: bool = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_keyset_filter(self, values: List[Any]) -> Q:
+        lookup: str = 'lt' if self.reverse else 'gt'
+        leading: str = 'lte' if self.reverse else 'gte'
+
+        # (a, b) > (x, y)  ==  a >= x AND (a > x OR (a = x AND b > y)); the
+        # leading bound keeps the filter usable as an index range.
+        keyset: Q = Q()
+        equal: Q = Q()
+        for field, value in zip(self.ordering, values):
+            keyset |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+
+        return Q(**{f'{self.ordering[0]}__{leading}': values[0]}) & keyset
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size: int = int(
+                request.query_params[self.page_size_query_param]
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request) -> Tuple[Optional[List[Any]], bool]:
+        encoded: Optional[str] = request.query_params.get(
+            self.cursor_query_param
+        )
+        if not encoded:
+            return None, False
+
+        try:
+            data: dict = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii'))
+            )
+            values: List[Any] = data['k']
+            reverse: bool = bool(data.get('r'))
+        except (
+            binascii.Error,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def clean_cursor(
+        self,
+        model: Type[Model],
+        values: List[Any]
+    ) -> List[Any]:
+        # A cursor that decodes can still hold values its fields reject.
+        cleaned: List[Any] = []
+        for field, value in zip(self.ordering, values):
+            try:
+                value = model._meta.get_field(field).to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+
+        return cleaned
+
+    def encode_cursor(self, item: Any, reverse: bool) -> str:
+        values: List[Any] = []
+        for field in self.ordering:
+            value: Any = getattr(item, field)
+            # isoformat() keeps the microseconds DjangoJSONEncoder drops.
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+
+        data: dict = {'k': values}
+        if reverse:
+            data['r'] = 1
+
+        encoded: bytes = base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode('utf-8')
+        )
+        url: str = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            encoded.decode('ascii')
+        )
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view) -> List[dict]:
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,88 @@
+import random
+from contextvars import ContextVar, Token
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import DEFAULT_DB_ALIAS
+
+# Replica alias the current request reads from, None reads the primary.
+_replica: ContextVar[Optional[str]] = ContextVar('replica', default=None)
+
+
+def get_replicas() -> List[str]:
+    return list(settings.READ_REPLICAS['ALIASES'])
+
+
+def get_sticky_seconds() -> int:
+    return settings.READ_REPLICAS['STICKY_SECONDS']
+
+
+def get_pin_cache() -> BaseCache:
+    return caches[settings.READ_REPLICAS['CACHE_ALIAS']]
+
+
+def current_replica() -> Optional[str]:
+    return _replica.get()
+
+
+def use_replica() -> Optional[Token]:
+    """
+    Route reads in the current context to a random replica, until
+    release_replica() is called with the returned token.
+    """
+    replicas: List[str] = get_replicas()
+    if not replicas:
+        return None
+
+    return _replica.set(random.choice(replicas))
+
+
+def release_replica(token: Optional[Token]) -> None:
+    if token is not None:
+        _replica.reset(token)
+
+
+def pin_key(user) -> str:
+    return f'replica:pinned:{user.pk}'
+
+
+def pin_to_primary(user) -> None:
+    # Covers replication lag: the user's next reads see their own write.
+    if user.is_authenticated and get_replicas():
+        get_pin_cache().set(pin_key(user), True, get_sticky_seconds())
+
+
+def is_pinned(user) -> bool:
+    if not user.is_authenticated:
+        return False
+
+    return get_pin_cache().get(pin_key(user), False)
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads to the replica chosen by use_replica() and everything else
+    to the primary. Replicas hold the same data, so relations between
+    objects loaded from either are allowed, and they are never migrated.
+    """
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        return current_replica()
+
+    def db_for_write(self, model, **hints) -> str:
+        # Without this an instance loaded from a replica would be saved back
+        # to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        databases: List[str] = [DEFAULT_DB_ALIAS, *get_replicas()]
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, **hints) -> Optional[bool]:
+        if db in get_replicas():
+            return False
+
+        return None
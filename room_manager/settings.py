@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'room_manager.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,6 +91,141 @@ DATABASES = {
     },
 }
 
+# Streaming replicas of the primary, as comma separated host[:port] values.
+# Safe requests to the room viewsets read from them, see
+# room_manager.routers.
+for index, replica in enumerate(filter(None, os.environ.get(
+    'POSTGRES_REPLICA_HOSTS',
+    ''
+).split(','))):
+    host, _sep, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': int(port or DATABASES['default']['PORT']),
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+
+DATABASE_ROUTERS = [
+    'room_manager.routers.ReadReplicaRouter',
+]
+
+READ_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    # After a write the user reads from the primary for this long, it has to
+    # cover the replication lag. Pins are kept in this cache, which must be
+    # shared between processes in production.
+    'STICKY_SECONDS': int(os.environ.get('REPLICA_STICKY_SECONDS', '5')),
+    'CACHE_ALIAS': 'default',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+}
+
+PUBLIC_EVENT_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('PUBLIC_EVENT_CACHE_TIMEOUT', '300')),
+}
+
+
+# Seat holds
+# Seconds a held seat stays reserved for the user before it is released.
+
+SEAT_HOLD_TTL = int(os.environ.get('SEAT_HOLD_TTL', '600'))
+
+
+# Idempotency keys
+# Seconds a create response is replayed for retries with the same
+# Idempotency-Key header; purge_expired deletes older keys.
+
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', '86400'))
+
+# Seconds a key stays claimed while its request runs; the key of a request
+# that crashed can be taken over by a retry once this runs out.
+
+IDEMPOTENCY_KEY_LEASE = int(os.environ.get('IDEMPOTENCY_KEY_LEASE', '60'))
+
+
+# Live capacity
+# Server-Sent Events of remaining capacity, see room.live. Followed events
+# are re-read every POLL_SECONDS, and at once after a reservation commits
+# in the same process.
+
+LIVE_CAPACITY = {
+    'POLL_SECONDS': float(os.environ.get('LIVE_CAPACITY_POLL_SECONDS', '2')),
+    'KEEPALIVE_SECONDS': 15,
+    'MAX_EVENTS': 100,
+}
+
+
+# Outbox
+# Side effects of reservation and event changes are queued in the database
+# and delivered by `manage.py run_outbox_worker`, see room.outbox. Handlers
+# are dotted paths per topic, each called with the OutboxMessage.
+
+OUTBOX = {
+    'HANDLERS': {
+        'reservation.created': ['room.outbox.log_message'],
+        'reservation.deleted': ['room.outbox.log_message'],
+        'event.rescheduled': ['room.outbox.log_message'],
+    },
+    'BATCH_SIZE': 100,
+    'WORKERS': int(os.environ.get('OUTBOX_WORKERS', '4')),
+    # A claimed message is retried once this passes without a result.
+    'LEASE_SECONDS': 300,
+    'POLL_SECONDS': 1.0,
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF_SECONDS': 10,
+    'MAX_BACKOFF_SECONDS': 3600,
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/4.1/topics/logging/
+
+# Requests issuing at least this many queries are logged by
+# room_manager.middleware at WARNING, so they show at the default level;
+# all others are logged at INFO.
+
+SQL_LOG_WARNING_QUERIES = int(
+    os.environ.get('SQL_LOG_WARNING_QUERIES', '50')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'room_manager.sql': {
+            'handlers': ['console'],
+            'level': os.environ.get('SQL_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'room.outbox': {
+            'handlers': ['console'],
+            'level': os.environ.get('OUTBOX_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -133,7 +269,20 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'room_manager.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAdminUser'
     ]
 }
+
+# Tokens from /api/token/, see room_manager.authentication. Users are cached
+# per process, a change made by another process shows after CACHE_SECONDS.
+TOKEN_AUTH = {
+    'MAX_AGE': int(os.environ.get('TOKEN_MAX_AGE', '86400')),
+    'CACHE_SIZE': 1024,
+    'CACHE_SECONDS': int(os.environ.get('TOKEN_USER_CACHE_SECONDS', '60')),
+}
@@ -0,0 +1,38 @@
+from typing import Callable, Iterable, List
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from room_manager.middleware import QueryStats
+
+
+class QueryCountAssertionsMixin:
+    def assertQueryCountConstant(
+        self,
+        request: Callable[[], object],
+        grow: Callable[[int], None],
+        sizes: Iterable[int] = (1, 5),
+    ) -> None:
+        """
+        Call ``grow(n)`` to add rows, then ``request()``, for every size;
+        fail when the request's query count changes with the result size
+        (an N+1), naming the query shapes that repeat.
+        """
+        counts: List[int] = []
+        stats: QueryStats = QueryStats()
+
+        for size in sizes:
+            grow(size)
+            with CaptureQueriesContext(connection) as ctx:
+                request()
+            counts.append(len(ctx.captured_queries))
+
+            stats = QueryStats()
+            for query in ctx.captured_queries:
+                stats.record(query['sql'])
+
+        if len(set(counts)) > 1:
+            self.fail(
+                f"Query count grows with result size {list(sizes)}: "
+                f"{counts}. Repeated shapes: {stats.duplicates[:3]}"
+            )
@@ -18,6 +18,9 @@ from django.urls import path, include
 
 from rest_framework import routers
 
+from room_manager.views import SignedTokenView
+
+from room import async_views as room_async_views
 from room import views as room_views
 
 
@@ -38,9 +41,48 @@ router.register(
     r'reservations',
     room_views.ReservationSerializerModelViewSet
 )
+router.register(
+    r'archive/events',
+    room_views.ArchivedEventModelViewSet
+)
+router.register(
+    r'archive/reservations',
+    room_views.ArchivedReservationModelViewSet
+)
+
+
+async_urlpatterns = [
+    path(
+        'rooms/',
+        room_async_views.room_list,
+        name='async-room-list'
+    ),
+    path(
+        'rooms/<str:pk>/',
+        room_async_views.room_detail,
+        name='async-room-detail'
+    ),
+    path(
+        'events/',
+        room_async_views.event_list,
+        name='async-event-list'
+    ),
+    path(
+        'events/<str:pk>/',
+        room_async_views.event_detail,
+        name='async-event-detail'
+    ),
+    path(
+        'reservations/',
+        room_async_views.reservation_list,
+        name='async-reservation-list'
+    ),
+]
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/token/', SignedTokenView.as_view(), name='api-token'),
     path('api/', include(router.urls)),
+    path('api/async/', include(async_urlpatterns)),
 ]
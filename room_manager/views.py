@@ -0,0 +1,24 @@
+from rest_framework.authtoken.serializers import AuthTokenSerializer
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from room_manager.authentication import get_token_settings, make_token
+
+
+class SignedTokenView(APIView):
+    # Trades a username and password for a SignedTokenAuthentication token.
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = AuthTokenSerializer(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        return Response({
+            'token': make_token(serializer.validated_data['user']),
+            'expires_in': get_token_settings()['MAX_AGE'],
+        })